@@ -49,6 +49,15 @@ def main(args):
                       help="add builtin global data types automatically, e.g. boolean, integer and real",
                       action="store_true", default=False)
                       
+    parser.add_option("-j", "--jobs", dest="jobs", type='int', metavar="<number>",
+                      help="parse model files using <number> processes in parallel",
+                      action="store", default=1)
+    
+    parser.add_option("--cache-dir", dest="cache_directory", metavar="<path>",
+                      help="cache parsed model files in <path>, which must only be writable by "
+                           "trusted users since cached files are unpickled",
+                      action="store", default=None)
+    
     parser.add_option("-v", "--verbosity", dest='verbosity', action="count",
                       help="increase debug logging level", default=1)
     
@@ -65,9 +74,10 @@ def main(args):
     }
     logging.basicConfig(level=levels.get(opts.verbosity, logging.DEBUG))
     
-    loader = ooaofooa.Loader(load_globals=opts.globals)
+    loader = ooaofooa.Loader(load_globals=opts.globals,
+                             cache_directory=opts.cache_directory)
     for filename in args:
-        loader.filename_input(filename)
+        loader.filename_input(filename, opts.jobs)
 
     m = loader.build_metamodel()
     
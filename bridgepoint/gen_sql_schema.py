@@ -57,6 +57,15 @@ def main():
                       help="save sql schema to PATH (required)",
                       action="store", default=None)
     
+    parser.add_option("-j", "--jobs", dest="jobs", type='int', metavar="NUMBER",
+                      help="parse model files using NUMBER processes in parallel",
+                      action="store", default=1)
+    
+    parser.add_option("--cache-dir", dest="cache_directory", metavar="PATH",
+                      help="cache parsed model files in PATH, which must only be writable by "
+                           "trusted users since cached files are unpickled",
+                      action="store", default=None)
+    
     parser.add_option("-v", "--verbosity", dest='verbosity', action="count", 
                       help="increase debug logging level", default=2)
 
@@ -74,9 +83,9 @@ def main():
     }
     logging.basicConfig(level=levels.get(opts.verbosity, logging.DEBUG))
 
-    loader = ooaofooa.Loader()
+    loader = ooaofooa.Loader(cache_directory=opts.cache_directory)
     for filename in args:
-        loader.filename_input(filename)
+        loader.filename_input(filename, opts.jobs)
 
     c = loader.build_component(opts.component, opts.derived)
     xtuml.persist_database(c, opts.output)
@@ -265,6 +265,15 @@ def main(args):
                       action="store", help="save xsd schema to PATH (required)",
                       default=None)
     
+    parser.add_option("-j", "--jobs", dest="jobs", type='int', metavar="NUMBER",
+                      help="parse model files using NUMBER processes in parallel",
+                      action="store", default=1)
+    
+    parser.add_option("--cache-dir", dest="cache_directory", metavar="PATH",
+                      help="cache parsed model files in PATH, which must only be writable by "
+                           "trusted users since cached files are unpickled",
+                      action="store", default=None)
+    
     parser.add_option("-v", "--verbosity", dest='verbosity', action="count", 
                       help="increase debug logging level", default=2)
     
@@ -281,7 +290,8 @@ def main(args):
     }
     logging.basicConfig(level=levels.get(opts.verbosity, logging.DEBUG))
     
-    m = ooaofooa.load_metamodel(args)
+    m = ooaofooa.load_metamodel(args, jobs=opts.jobs,
+                                cache_directory=opts.cache_directory)
     c_c = m.select_any('C_C', lambda inst: inst.Name == opts.component)
     if c_c:
         schema = build_schema(m, c_c)
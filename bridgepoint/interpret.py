@@ -568,6 +568,15 @@ def main():
                       help="look for the function in a component named NAME",
                       metavar='NAME', default=None)
     
+    parser.add_option("-j", "--jobs", dest='jobs', action="store", type='int',
+                      help="parse model files using NUMBER processes in parallel",
+                      metavar='NUMBER', default=1)
+    
+    parser.add_option("--cache-dir", dest='cache_directory', action="store",
+                      help="cache parsed model files in PATH, which must only be writable by "
+                           "trusted users since cached files are unpickled",
+                      metavar='PATH', default=None)
+    
     (opts, args) = parser.parse_args()
     if len(args) == 0 or not opts.function:
         parser.print_help()
@@ -582,7 +591,8 @@ def main():
     logging.basicConfig(level=levels.get(opts.verbosity, logging.DEBUG))
     
     from bridgepoint import ooaofooa
-    mm = ooaofooa.load_metamodel(args)
+    mm = ooaofooa.load_metamodel(args, jobs=opts.jobs,
+                                 cache_directory=opts.cache_directory)
     c_c = mm.select_any('C_C', where(Name=opts.component))
     domain = ooaofooa.mk_component(mm, c_c, derived_attributes=False)
     
@@ -26,6 +26,7 @@ Heavily inspired by:
 
 import os
 import logging
+import threading
 
 from ply import lex
 from ply import yacc
@@ -921,6 +922,9 @@ class OALParser(object):
         ('right', 'UNARY'),
     )
     
+    parser = None
+    lexer = None
+    
     def __init__(self):
         self.parser = yacc.yacc(debuglog=logger,
                                 errorlog=logger,
@@ -928,17 +932,18 @@ class OALParser(object):
                                 module=self,
                                 outputdir=os.path.dirname(__file__),
                                 tabmodule='bridgepoint.__oal_parsetab')
+        
+        self.lexer = lex.lex(debuglog=logger,
+                             errorlog=logger,
+                             optimize=1,
+                             module=self,
+                             outputdir=os.path.dirname(__file__),
+                             lextab="bridgepoint.__oal_lextab")
 
     def text_input(self, text, label='<string>'):
-        lexer = lex.lex(debuglog=logger,
-                        errorlog=logger,
-                        optimize=1,
-                        module=self,
-                        outputdir=os.path.dirname(__file__),
-                        lextab="bridgepoint.__oal_lextab")
-
-        lexer.label = label
-        return self.parser.parse(lexer=lexer,
+        self.lexer.lineno = 1
+        self.lexer.label = label
+        return self.parser.parse(lexer=self.lexer,
                                  input=text,
                                  tracking=1)
 
@@ -1999,12 +2004,19 @@ class OALParser(object):
             raise ParseException("unknown parsing error")
 
 
+_local = threading.local()
+
+
 def parse(action_code, label='<string>'):
     '''
     Parse and construct an abstract syntax tree for text expressed in the
     Object Action Language (OAL).
     '''
-    parser = OALParser()
+    # parsers are reused by subsequent calls from the same thread
+    parser = getattr(_local, 'parser', None)
+    if parser is None:
+        parser = _local.parser = OALParser()
+        
     return parser.text_input(action_code + '\n', label)
 
 
@@ -18,6 +18,8 @@
 
 import collections
 import functools
+import hashlib
+import importlib
 import os
 import logging
 import keyword
@@ -490,33 +492,188 @@ def mk_component(bp_model, c_c=None, derived_attributes=False):
     return target
 
 
+# Attributes that are frequently used to look up ooaofooa instances by name
+secondary_indices = (
+    ('C_C', 'Name'),
+    ('EP_PKG', 'Name'),
+    ('O_OBJ', 'Key_Lett'),
+    ('S_DT', 'Name'),
+    ('S_EE', 'Key_Lett'),
+    ('S_SYNC', 'Name'),
+)
+
+
+_snapshot_module = 'bridgepoint.__ooaofooa_snapshot'
+_snapshot_statements = None
+
+
+def _schema_signature():
+    '''
+    Compute a signature of the ooaofooa schema, used to determine if a
+    snapshot of the schema is out of date.
+    '''
+    sha1 = hashlib.sha1()
+    for data in [xtuml.version.release, schema.classes, schema.associations,
+                 schema.indices, schema.globals]:
+        sha1.update(data.encode('utf-8'))
+        
+    return sha1.hexdigest()
+
+
+def _parse_schema():
+    '''
+    Parse the ooaofooa schema, and return the statements it contains grouped
+    by the name of the schema section they originate from.
+    '''
+    loader = xtuml.ModelLoader()
+    statements = dict()
+    for name, fmt in [('classes', 'ooaofooa classes (v%02.1f)'),
+                      ('associations', 'ooaofooa associations (v%02.1f)'),
+                      ('indices', 'ooaofooa indices (v%02.1f)'),
+                      ('globals', 'predefined ooaofooa globals (v%02.1f)')]:
+        data = getattr(schema, name)
+        statements[name] = loader._parse(data, fmt % schema.__version__)
+        
+    return statements
+
+
+def _write_snapshot(statements, signature, filename=None):
+    '''
+    Write a snapshot of parsed schema *statements* with some *signature* to a
+    python module with some *filename*, by default located next to this file.
+    The file is replaced atomically, so concurrent imports never see a partial
+    snapshot.
+    '''
+    if filename is None:
+        filename = os.path.join(os.path.dirname(__file__),
+                                _snapshot_module.split('.')[-1] + '.py')
+    
+    fields = dict()
+    filenames = dict()
+    for name, stmts in statements.items():
+        for stmt in stmts:
+            attributes = sorted(vars(stmt))
+            attributes.remove('filename')
+            fields[type(stmt).__name__] = attributes
+            filenames[name] = stmt.filename
+            
+    tmp = '%s.%d.tmp' % (filename, os.getpid())
+    with open(tmp, 'w') as f:
+        f.write('# %s\n' % os.path.basename(filename))
+        f.write('# This file is automatically generated. Do not edit.\n')
+        f.write('signature = %r\n' % signature)
+        f.write('fields = %r\n' % sorted(fields.items()))
+        f.write('filenames = %r\n' % sorted(filenames.items()))
+        f.write('statements = {\n')
+        for name in sorted(statements):
+            f.write('  %r: [\n' % name)
+            for stmt in statements[name]:
+                kind = type(stmt).__name__
+                values = tuple(getattr(stmt, attr) for attr in fields[kind])
+                f.write('    (%r, %r),\n' % (kind, values))
+            f.write('  ],\n')
+        f.write('}\n')
+
+    if os.name == 'nt' and os.path.exists(filename):
+        os.remove(filename)
+        
+    os.rename(tmp, filename)
+
+
+def _read_snapshot(signature):
+    '''
+    Read a snapshot of parsed schema statements with some *signature*. None is
+    returned if the snapshot is missing, unreadable, or out of date.
+    '''
+    try:
+        module = importlib.import_module(_snapshot_module)
+    except Exception as e:
+        logger.debug('unable to read schema snapshot: %s' % e)
+        return None
+    
+    if getattr(module, 'signature', None) != signature:
+        return None
+    
+    fields = dict(module.fields)
+    filenames = dict(module.filenames)
+    statements = dict()
+    for name, stmts in module.statements.items():
+        statements[name] = list()
+        for kind, values in stmts:
+            cls = getattr(xtuml.load, kind)
+            stmt = cls.__new__(cls)
+            stmt.__dict__.update(zip(fields[kind], values))
+            stmt.filename = filenames[name]
+            statements[name].append(stmt)
+            
+    return statements
+
+
+def _load_schema():
+    '''
+    Load parsed statements from the ooaofooa schema. The statements are read
+    from a prebuilt snapshot of the schema. If the snapshot is missing or out
+    of date, the schema is parsed instead.
+    '''
+    global _snapshot_statements
+    
+    if _snapshot_statements is not None:
+        return _snapshot_statements
+    
+    statements = _read_snapshot(_schema_signature())
+    if statements is None:
+        logger.debug('parsing the ooaofooa schema, the snapshot is out of date')
+        statements = _parse_schema()
+            
+    _snapshot_statements = statements
+    return statements
+
+
+def _build_snapshot():
+    '''
+    Write a snapshot of the ooaofooa schema next to this file, unless an up to
+    date snapshot already exists. Snapshots are only written when the package
+    is built, see setup.py.
+    '''
+    signature = _schema_signature()
+    if _read_snapshot(signature) is None:
+        _write_snapshot(_parse_schema(), signature)
+
+
 class ModelLoader(xtuml.ModelLoader):
     '''
     A *xtuml.MetaModel* loader with ooaofooa schema and globals pre-defined.
     '''
     
-    def __init__(self, load_globals=True):
-        xtuml.ModelLoader.__init__(self)
-        self.input(schema.classes, 'ooaofooa classes (v%02.1f)' % schema.__version__)
-        self.input(schema.associations, 'ooaofooa associations (v%02.1f)' % schema.__version__)
-        self.input(schema.indices, 'ooaofooa indices (v%02.1f)' % schema.__version__)
+    def __init__(self, load_globals=True, cache_directory=None, lazy=False,
+                 specialize=False):
+        xtuml.ModelLoader.__init__(self, cache_directory, lazy, specialize)
+        statements = _load_schema()
+        self._add_statements(statements['classes'])
+        self._add_statements(statements['associations'])
+        self._add_statements(statements['indices'])
         if load_globals:
-            self.input(schema.globals, 'predefined ooaofooa globals (v%02.1f)' % schema.__version__)
+            self._add_statements(statements['globals'])
         
-    def filename_input(self, path_or_filename):
+    def filename_input(self, path_or_filename, jobs=1):
         '''
         Open and read input from a *path or filename*, and parse its content.
         
         If the filename is a directory, files that ends with .xtuml located
         somewhere in the directory or sub directories will be loaded as well.
+        Optionally, the files may be parsed by several *jobs* in parallel.
         '''
-        if os.path.isdir(path_or_filename):
-            for path, _, files in os.walk(path_or_filename):
-                for name in files:
-                    if name.endswith('.xtuml'):
-                        xtuml.ModelLoader.filename_input(self, os.path.join(path, name))
-        else:
-            xtuml.ModelLoader.filename_input(self, path_or_filename)
+        self.filenames_input(_find_filenames(path_or_filename), jobs)
+
+    def populate_unique_identifiers(self, metamodel):
+        '''
+        Populate a *metamodel* with class unique identifiers previously
+        encountered from input, and with secondary indices on attributes
+        frequently used in queries.
+        '''
+        xtuml.ModelLoader.populate_unique_identifiers(self, metamodel)
+        for kind, name in secondary_indices:
+            metamodel.define_index(kind, name)
 
     def build_component(self, name=None, derived_attributes=False):
         '''
@@ -541,35 +698,76 @@ class ModelLoader(xtuml.ModelLoader):
             return mk_component(mm, c_c, derived_attributes)
     
 
-def _mk_loader(resource, load_globals):
+def _find_filenames(path_or_filename):
+    '''
+    Find filenames of files to load from a *path or filename*, i.e. the
+    filename itself or, given a directory, files that ends with .xtuml located
+    somewhere in the directory or sub directories, in alphabetical order.
+    '''
+    if not os.path.isdir(path_or_filename):
+        return [path_or_filename]
+    
+    filenames = list()
+    for path, dirs, files in os.walk(path_or_filename):
+        dirs.sort()
+        for name in sorted(files):
+            if name.endswith('.xtuml'):
+                filenames.append(os.path.join(path, name))
+    
+    return filenames
+    
+
+def _mk_loader(resource, load_globals, jobs=1, cache_directory=None,
+               lazy=False, kinds=None, attributes=None):
     resource = resource or list()
         
     if isinstance(resource, str):
         resource = [resource]
         
-    loader = Loader(load_globals)
-    for filename in resource:
-        loader.filename_input(filename)
+    filenames = list()
+    for path_or_filename in resource:
+        filenames.extend(_find_filenames(path_or_filename))
+        
+    loader = Loader(load_globals, cache_directory, lazy)
+    loader.stream(kinds=kinds, attributes=attributes)
+    loader.filenames_input(filenames, jobs)
     
     return loader
 
 
-def load_metamodel(resource=None, load_globals=True):
+def load_metamodel(resource=None, load_globals=True, jobs=1,
+                   cache_directory=None, lazy=False, kinds=None,
+                   attributes=None):
     '''
     Load and return a metamodel expressed in ooaofooa from a *resource*.
     The resource may be either a filename, a path, or a list of filenames
-    and/or paths.
-    '''
-    loader = _mk_loader(resource, load_globals)
+    and/or paths. Optionally, the files may be parsed by several *jobs* in
+    parallel, and parsed files may be kept in a *cache directory* for
+    subsequent loads, see xtuml.ModelLoader.filename_input() for security
+    considerations. If the metamodel is *lazy*, instances are related
+    across an association the first time it is used.
+    
+    The instances loaded may be restricted to some *kinds*, e.g. O_OBJ and
+    O_ATTR, and to some *attributes* of those kinds, given as a dictionary
+    that maps kinds to attribute names.
+    '''
+    loader = _mk_loader(resource, load_globals, jobs, cache_directory, lazy,
+                        kinds, attributes)
     return loader.build_metamodel()
 
 
-def load_component(resource, name=None, load_globals=True):
+def load_component(resource, name=None, load_globals=True, jobs=1,
+                   cache_directory=None, lazy=False):
     '''
     Load and return a model from a *resource*. The resource may be either a
-    filename, a path, or a list of filenames and/or paths.
-    '''
-    loader = _mk_loader(resource, load_globals)
+    filename, a path, or a list of filenames and/or paths. Optionally, the
+    files may be parsed by several *jobs* in parallel, and parsed files may be
+    kept in a *cache directory* for subsequent loads, see
+    xtuml.ModelLoader.filename_input() for security considerations. If the
+    ooaofooa model is *lazy*, its instances are related across an association the first time it
+    is used.
+    '''
+    loader = _mk_loader(resource, load_globals, jobs, cache_directory, lazy)
     return loader.build_component()
 
 
@@ -1868,6 +1868,19 @@ def main():
                                         action="store",
                                         default=None)
     
+    parser.add_option("-j", "--jobs", dest="jobs", metavar="NUMBER",
+                                      help="parse model files using NUMBER "
+                                           "processes in parallel",
+                                      action="store",
+                                      type="int",
+                                      default=1)
+    
+    parser.add_option("--cache-dir", dest="cache_directory", metavar="PATH",
+                                     help="cache parsed model files in PATH, which must only be writable by "
+                                          "trusted users since cached files are unpickled",
+                                     action="store",
+                                     default=None)
+    
     (opts, args) = parser.parse_args()
     if len(args) == 0 or opts.output is None:
         parser.print_help()
@@ -1881,7 +1894,8 @@ def main():
     }
     logging.basicConfig(level=levels.get(opts.verbosity, logging.DEBUG))
     
-    m = ooaofooa.load_metamodel(args)
+    m = ooaofooa.load_metamodel(args, jobs=opts.jobs,
+                                cache_directory=opts.cache_directory)
     prebuild_model(m)
     
     xtuml.persist_instances(m, opts.output)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# Copyright (C) 2017 John Törnblom
+#
+# This file is part of pyxtuml.
+#
+# pyxtuml is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+#
+# pyxtuml is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with pyxtuml. If not, see <http://www.gnu.org/licenses/>.
+'''
+Measure the time it takes to parse many small inputs, i.e. schema strings,
+OAL actions and files.
+
+Run the script on two revisions of pyxtuml to compare them, e.g.
+
+    python examples/benchmark_parsing.py -n 2000
+'''
+
+import optparse
+import os
+import shutil
+import tempfile
+import time
+import xtuml
+
+from bridgepoint import oal
+
+
+def write_files(directory, count):
+    '''
+    Write a schema and some *count* of small files with instances to a
+    *directory*, and return their filenames.
+    '''
+    filenames = [os.path.join(directory, 'schema.sql')]
+    with open(filenames[0], 'w') as f:
+        f.write('CREATE TABLE X (Id INTEGER, Name STRING);\n')
+        f.write('CREATE TABLE Y (Id INTEGER, X_Id INTEGER);\n')
+        f.write('CREATE ROP REF_ID R1 FROM MC Y (X_Id) TO 1 X (Id);\n')
+        
+    for idx in range(count):
+        filename = os.path.join(directory, 'f%04d.sql' % idx)
+        with open(filename, 'w') as f:
+            f.write("INSERT INTO X VALUES (%d, 'x%d');\n" % (idx, idx))
+            f.write('INSERT INTO Y VALUES (%d, %d);\n' % (idx, idx))
+            
+        filenames.append(filename)
+        
+    return filenames
+
+
+def main():
+    parser = optparse.OptionParser(usage='%prog [options]')
+    parser.add_option('-n', dest='count', metavar='NUMBER', type='int',
+                      help='number of inputs (default: 2000)', default=2000)
+    (opts, args) = parser.parse_args()
+    
+    started = time.time()
+    loader = xtuml.ModelLoader()
+    for idx in range(opts.count):
+        loader.input('CREATE TABLE T%d (Id INTEGER);' % idx)
+    print('ModelLoader.input() %d schema strings: %.2fs' %
+          (opts.count, time.time() - started))
+    
+    started = time.time()
+    parser = oal.OALParser()
+    for idx in range(opts.count):
+        parser.text_input('assign x = %d;\n' % idx)
+    print('OALParser.text_input() %d actions: %.2fs' %
+          (opts.count, time.time() - started))
+    
+    started = time.time()
+    for idx in range(opts.count):
+        oal.parse('assign x = %d;' % idx)
+    print('oal.parse() %d actions: %.2fs' %
+          (opts.count, time.time() - started))
+    
+    directory = tempfile.mkdtemp()
+    try:
+        filenames = write_files(directory, opts.count)
+        started = time.time()
+        xtuml.load_metamodel(filenames)
+        print('xtuml.load_metamodel() %d files: %.2fs' %
+              (len(filenames), time.time() - started))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
+    
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# Copyright (C) 2017 John Törnblom
+#
+# This file is part of pyxtuml.
+#
+# pyxtuml is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+#
+# pyxtuml is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with pyxtuml. If not, see <http://www.gnu.org/licenses/>.
+'''
+Measure the time it takes to relate and unrelate instances, and to prebuild
+synthetic function bodies, in a metamodel expressed in ooaofooa.
+
+Run the script on two revisions of pyxtuml to compare them, e.g.
+
+    python examples/benchmark_prebuild.py -n 1000
+'''
+
+import optparse
+import sys
+import time
+import xtuml
+
+from bridgepoint import ooaofooa
+from bridgepoint import prebuild
+
+
+body = '''
+x = 1;
+y = x + 2;
+while (x < 10)
+    x = x + 1;
+    if (x == 5)
+        y = y * 2;
+    elif (x == 6)
+        y = y - 1;
+    else
+        y = y + x;
+    end if;
+end while;
+return;
+'''
+
+
+def populate(m, count):
+    '''
+    Populate a metamodel *m* with some *count* of functions, each with the
+    same synthetic body.
+    '''
+    s_dt = m.select_any('S_DT', xtuml.where_eq(Name='void'))
+    for idx in range(count):
+        pe_pe = m.new('PE_PE')
+        s_sync = m.new('S_SYNC', Name='f%d' % idx, Suc_Pars=1,
+                       Action_Semantics_internal=body)
+        xtuml.relate(s_sync, pe_pe, 8001)
+        xtuml.relate(s_dt, s_sync, 25)
+
+
+def relate_and_unrelate(m):
+    '''
+    Unrelate and relate all functions in a metamodel *m* from and to their
+    packageable elements and return types.
+    '''
+    for s_sync in m.select_many('S_SYNC'):
+        pe_pe = xtuml.navigate_one(s_sync).PE_PE[8001]()
+        s_dt = xtuml.navigate_one(s_sync).S_DT[25]()
+        xtuml.unrelate(s_sync, pe_pe, 8001)
+        xtuml.unrelate(s_dt, s_sync, 25)
+        xtuml.relate(s_sync, pe_pe, 8001)
+        xtuml.relate(s_dt, s_sync, 25)
+
+
+def main():
+    parser = optparse.OptionParser(usage='%prog [options]')
+    parser.add_option('-n', dest='count', metavar='NUMBER', type='int',
+                      help='number of functions (default: 1000)',
+                      default=1000)
+    (opts, args) = parser.parse_args()
+    
+    m = ooaofooa.load_metamodel()
+    
+    started = time.time()
+    populate(m, opts.count)
+    print('populate %d functions: %.2fs' % (opts.count,
+                                            time.time() - started))
+    
+    started = time.time()
+    relate_and_unrelate(m)
+    print('relate and unrelate %d functions: %.2fs' % (opts.count,
+                                                       time.time() - started))
+    
+    started = time.time()
+    prebuild.prebuild_model(m)
+    print('prebuild %d functions: %.2fs' % (opts.count,
+                                            time.time() - started))
+
+
+if __name__ == '__main__':
+    main()
+    
@@ -31,7 +31,7 @@ if len(sys.argv) < 2:
     sys.exit(1)
 
     
-m = ooaofooa.load_metamodel(sys.argv[1])
+m = ooaofooa.load_metamodel(sys.argv[1], kinds=['O_OBJ', 'O_ATTR', 'S_DT'])
 
 
 by_name = lambda inst: inst.Name
@@ -30,7 +30,7 @@ if len(sys.argv) < 2:
     sys.exit(1)
 
     
-m = ooaofooa.load_metamodel(sys.argv[1])
+m = ooaofooa.load_metamodel(sys.argv[1], kinds=['S_DT', 'S_EDT', 'S_ENUM'])
 
 
 get_name = lambda inst: one(inst).S_DT[17]().Name
@@ -38,11 +38,13 @@ class BuildCommand(build_py):
     def run(self):
         import xtuml
         from bridgepoint import oal
+        from bridgepoint import ooaofooa
 
         l = xtuml.ModelLoader()
         l.input('', name='<empty string>')
         l.build_metamodel()
         oal.parse('')
+        ooaofooa._build_snapshot()
         build_py.run(self)
 
 
@@ -15,9 +15,14 @@
 #
 # You should have received a copy of the GNU Lesser General Public
 # License along with pyxtuml. If not, see <http://www.gnu.org/licenses/>.
+import os
+import shutil
+import sys
+import tempfile
 import unittest
 import xtuml
 from bridgepoint import ooaofooa
+from bridgepoint import schema
 
 
 class TestOoaOfOoa(unittest.TestCase):
@@ -34,6 +39,76 @@ class TestOoaOfOoa(unittest.TestCase):
         ooaofooa.delete_globals(m)
         s = xtuml.serialize_instances(m)
         self.assertFalse(s)
+
+    def test_schema_snapshot(self):
+        loader = xtuml.ModelLoader()
+        loader.input(schema.classes)
+        loader.input(schema.associations)
+        loader.input(schema.indices)
+        loader.input(schema.globals)
+        m1 = loader.build_metamodel()
+        m2 = ooaofooa.load_metamodel()
+        
+        self.assertEqual(xtuml.serialize_schema(m1),
+                         xtuml.serialize_schema(m2))
+        self.assertEqual(xtuml.serialize_unique_identifiers(m1),
+                         xtuml.serialize_unique_identifiers(m2))
+        self.assertEqual(xtuml.serialize_instances(m1),
+                         xtuml.serialize_instances(m2))
+        
+    def test_schema_snapshot_in_other_module(self):
+        directory = tempfile.mkdtemp()
+        module = ooaofooa._snapshot_module
+        sys.path.insert(0, directory)
+        try:
+            signature = ooaofooa._schema_signature()
+            ooaofooa._snapshot_module = 'snapshot_ok'
+            filename = os.path.join(directory, 'snapshot_ok.py')
+            ooaofooa._write_snapshot(ooaofooa._parse_schema(), signature,
+                                     filename)
+            self.assertEqual(os.listdir(directory), ['snapshot_ok.py'])
+            statements = ooaofooa._read_snapshot(signature)
+            self.assertEqual(len(statements['classes']),
+                             len(ooaofooa._load_schema()['classes']))
+            self.assertIsNone(ooaofooa._read_snapshot('other signature'))
+
+            ooaofooa._snapshot_module = 'snapshot_partial'
+            with open(os.path.join(directory, 'snapshot_partial.py'), 'w') as f:
+                f.write("signature = %r\nstatements = {\n" % signature)
+            self.assertIsNone(ooaofooa._read_snapshot(signature))
+            
+            ooaofooa._snapshot_module = 'snapshot_missing'
+            self.assertIsNone(ooaofooa._read_snapshot(signature))
+        finally:
+            ooaofooa._snapshot_module = module
+            sys.path.remove(directory)
+            shutil.rmtree(directory)
+        
+    def test_load_in_parallel(self):
+        resources = os.path.join(os.path.dirname(__file__), '..', 'resources')
+        m1 = ooaofooa.load_metamodel(resources, load_globals=False)
+        m2 = ooaofooa.load_metamodel(resources, load_globals=False, jobs=2)
+        
+        s = xtuml.serialize_instances(m1)
+        self.assertTrue(s)
+        self.assertEqual(s, xtuml.serialize_instances(m2))
+        
+    def test_load_lazily(self):
+        resources = os.path.join(os.path.dirname(__file__), '..', 'resources')
+        m1 = ooaofooa.load_metamodel(resources, load_globals=False)
+        m2 = ooaofooa.load_metamodel(resources, load_globals=False, lazy=True)
+        
+        self.assertEqual(xtuml.serialize_instances(m1),
+                         xtuml.serialize_instances(m2))
+        
+    def test_load_kinds(self):
+        resources = os.path.join(os.path.dirname(__file__), '..', 'resources')
+        m = ooaofooa.load_metamodel(resources, kinds=['O_OBJ', 'O_ATTR'])
+        
+        self.assertTrue(m.select_many('O_OBJ'))
+        self.assertFalse(m.select_many('S_DT'))
+        for o_attr in m.select_many('O_ATTR'):
+            self.assertTrue(xtuml.navigate_one(o_attr).O_OBJ[102]())
         
     
 if __name__ == "__main__":
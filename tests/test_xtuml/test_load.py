@@ -18,6 +18,9 @@
 
 import unittest
 import os
+import shutil
+import tempfile
+import weakref
 
 import xtuml
 
@@ -51,6 +54,259 @@ class TestLoader(unittest.TestCase):
 
         metamodel = xtuml.load_metamodel([globs, schema])
         self.assertTrue(metamodel.select_any('S_DT', xtuml.where_eq(Name='integer')) is not None)
+
+    def test_filename_input_in_parallel(self):
+        resources = os.path.dirname(__file__) + os.sep + '..' + os.sep + 'resources'
+        schema = resources + os.sep + 'ooaofooa_schema.sql'
+        globs = resources + os.sep + 'Globals.xtuml'
+
+        m1 = xtuml.load_metamodel([globs, schema])
+        m2 = xtuml.load_metamodel([globs, schema], jobs=2)
+        self.assertEqual(xtuml.serialize(m1), xtuml.serialize(m2))
+
+    def test_cache_directory(self):
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, 'model.sql')
+            cache_directory = os.path.join(directory, 'cache')
+            with open(filename, 'w') as f:
+                f.write('''CREATE TABLE X (Id INTEGER);
+                           INSERT INTO X VALUES (1);''')
+                
+            m = xtuml.load_metamodel(filename, cache_directory=cache_directory)
+            self.assertEqual(m.select_one('X').Id, 1)
+            self.assertEqual(len(os.listdir(cache_directory)), 1)
+            
+            m = xtuml.load_metamodel(filename, cache_directory=cache_directory)
+            self.assertEqual(m.select_one('X').Id, 1)
+            
+            with open(filename, 'w') as f:
+                f.write('''CREATE TABLE X (Id INTEGER);
+                           INSERT INTO X VALUES (12);''')
+                
+            m = xtuml.load_metamodel(filename, cache_directory=cache_directory)
+            self.assertEqual(m.select_one('X').Id, 12)
+            self.assertEqual(len(os.listdir(cache_directory)), 1)
+        finally:
+            shutil.rmtree(directory)
+
+    @unittest.skipIf(os.name == 'nt', 'file modes are not supported on nt')
+    def test_cache_directory_permissions(self):
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, 'model.sql')
+            cache_directory = os.path.join(directory, 'cache')
+            with open(filename, 'w') as f:
+                f.write('CREATE TABLE X (Id INTEGER);')
+
+            xtuml.load_metamodel(filename, cache_directory=cache_directory)
+            self.assertEqual(os.stat(cache_directory).st_mode & 0o077, 0)
+            for name in os.listdir(cache_directory):
+                path = os.path.join(cache_directory, name)
+                self.assertEqual(os.stat(path).st_mode & 0o077, 0)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_timings(self):
+        loader = xtuml.ModelLoader()
+        loader.input('''CREATE TABLE X (Id INTEGER);
+                        INSERT INTO X VALUES (1);''')
+        loader.build_metamodel()
+        for phase in ['parse', 'classes', 'instances', 'connections',
+                      'connections.index', 'connections.connect']:
+            self.assertIn(phase, loader.timings)
+            self.assertGreaterEqual(loader.timings[phase], 0)
+            
+    def test_lazy(self):
+        loader = xtuml.ModelLoader(lazy=True)
+        loader.input('''CREATE TABLE A (Id INTEGER);
+                        CREATE TABLE B (Id INTEGER, A_Id INTEGER);
+                        CREATE ROP REF_ID R1 FROM MC B (A_Id) TO 1 A (Id);
+                        INSERT INTO A VALUES (1);
+                        INSERT INTO B VALUES (2, 1);''')
+        m = loader.build_metamodel()
+        b = m.select_any('B')
+        raw_values = m.find_metaclass('B').raw_values['A_Id']
+        self.assertIn(b, raw_values)
+        
+        a = xtuml.navigate_one(b).A[1]()
+        self.assertEqual(a.Id, 1)
+        self.assertNotIn(b, raw_values)
+        self.assertEqual(b.A_Id, 1)
+        
+        xtuml.unrelate(b, a, 1)
+        self.assertIsNone(b.A_Id)
+        
+    def test_select_kinds_and_attributes(self):
+        loader = xtuml.ModelLoader()
+        loader.input('''CREATE TABLE A (Id INTEGER, Name STRING);
+                        CREATE TABLE B (Id INTEGER, A_Id INTEGER, Name STRING);
+                        CREATE TABLE C (Id INTEGER, B_Id INTEGER);
+                        CREATE ROP REF_ID R1 FROM MC B (A_Id) TO 1 A (Id);
+                        CREATE ROP REF_ID R2 FROM MC C (B_Id) TO 1 B (Id);
+                        INSERT INTO A VALUES (1, 'a');
+                        INSERT INTO B VALUES (2, 1, 'b');
+                        INSERT INTO B (Name, A_Id, Id) VALUES ('c', 1, 3);
+                        INSERT INTO C VALUES (4, 2);''')
+        
+        m = loader.build_metamodel(kinds=['A', 'B'],
+                                   attributes={'B': ['Id']})
+        self.assertFalse(m.select_many('C'))
+        self.assertEqual(len(m.associations), 1)
+        
+        a = m.select_any('A')
+        self.assertEqual(a.Name, 'a')
+        for b in m.select_many('B'):
+            self.assertIsNone(b.Name)
+            self.assertEqual(b.A_Id, 1)
+            self.assertEqual(xtuml.navigate_one(b).A[1](), a)
+            
+        m = loader.build_metamodel()
+        self.assertEqual(len(m.select_many('C')), 1)
+        self.assertEqual(m.select_one('B', xtuml.where_eq(Id=3)).Name, 'c')
+        
+    def test_mmap_input(self):
+        data = '''CREATE TABLE X (Id INTEGER, Name STRING);
+                  CREATE TABLE Y (Id INTEGER, X_Id INTEGER);
+                  CREATE ROP REF_ID R1 FROM MC Y (X_Id) TO 1 X (Id);
+                  -- a comment; with a semicolon
+                  INSERT INTO X VALUES (1, 'it''s; a -- test');
+                  INSERT INTO Y (X_Id, Id) VALUES (1, 2);
+                  INSERT INTO Y VALUES (3, 1);'''
+        with tempfile.NamedTemporaryFile('w', suffix='.sql',
+                                         delete=False) as f:
+            f.write(data)
+        try:
+            loader = xtuml.ModelLoader()
+            loader.mmap_input(f.name)
+            m1 = loader.build_metamodel()
+            
+            loader = xtuml.ModelLoader()
+            loader.chunk_size = 1
+            m2 = loader.stream()
+            loader.mmap_input(f.name)
+            loader.build_metamodel()
+        finally:
+            os.remove(f.name)
+            
+        for m in [m1, m2]:
+            x = m.select_one('X')
+            self.assertEqual(x.Name, "it's; a -- test")
+            self.assertEqual(len(xtuml.navigate_many(x).Y[1]()), 2)
+            
+        self.assertEqual(xtuml.serialize(m1), xtuml.serialize(m2))
+        
+    def test_compressed_input(self):
+        import gzip
+        data = b'''CREATE TABLE X (Id INTEGER, Name STRING);
+                   INSERT INTO X VALUES (1, 'a');
+                   INSERT INTO X VALUES (2, 'b');'''
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, 'model.sql')
+            with gzip.GzipFile(filename, 'wb') as f:
+                f.write(data)
+                
+            cache_directory = os.path.join(directory, 'cache')
+            for m in [xtuml.load_metamodel(filename),
+                      xtuml.load_metamodel(filename,
+                                           cache_directory=cache_directory)]:
+                self.assertEqual(len(m.select_many('X')), 2)
+                
+            loader = xtuml.ModelLoader()
+            loader.chunk_size = 1
+            loader.filename_input(filename)
+            self.assertEqual(len(loader.statements), 3)
+            self.assertEqual(loader.statements[2].lineno, 3)
+            
+            loader = xtuml.ModelLoader()
+            loader.chunk_size = 1
+            m = loader.stream()
+            loader.mmap_input(filename)
+            self.assertEqual(m.select_one('X', xtuml.where_eq(Id=2)).Name, 'b')
+        finally:
+            shutil.rmtree(directory)
+            
+    def stream_input(self, data, **kwargs):
+        loader = xtuml.ModelLoader()
+        loader.chunk_size = 1
+        m = loader.stream(**kwargs)
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, 'model.sql')
+            with open(filename, 'w') as f:
+                f.write(data)
+                
+            loader.filename_input(filename)
+        finally:
+            shutil.rmtree(directory)
+
+        self.assertEqual(loader.statements, [])
+        return loader.build_metamodel()
+        
+    def test_stream(self):
+        m = self.stream_input('''
+        INSERT INTO C VALUES (4);
+        CREATE TABLE A (Id INTEGER, Name STRING);
+        CREATE TABLE B (Id INTEGER, A_Id INTEGER);
+        INSERT INTO A VALUES (1, 'first;
+        -- not a comment;
+        '); -- it's a comment
+        INSERT INTO B VALUES (2, 1);
+        INSERT INTO A VALUES (3, 'it''s;');
+        CREATE ROP REF_ID R1 FROM MC B (A_Id) TO 1 A (Id);
+        CREATE TABLE C (Id INTEGER);
+        ''')
+        a = m.select_one('A', xtuml.where_eq(Id=1))
+        self.assertEqual(a.Name.count(';'), 2)
+        self.assertEqual(m.select_one('A', xtuml.where_eq(Id=3)).Name, "it's;")
+        
+        b = m.select_one('B')
+        self.assertEqual(xtuml.navigate_one(b).A[1](), a)
+        self.assertEqual(b.A_Id, 1)
+        
+        self.assertEqual(m.select_one('C').Id, 4)
+        self.assertEqual(m.find_metaclass('C').attribute_type('Id'), 'INTEGER')
+        
+    def test_stream_instance_order(self):
+        m = self.stream_input('''
+        INSERT INTO X VALUES (1);
+        INSERT INTO X VALUES (2);
+        CREATE TABLE X (Id INTEGER);
+        INSERT INTO X VALUES (3);
+        ''')
+        self.assertEqual([x.Id for x in m.select_many('X')], [1, 2, 3])
+        
+    def test_stream_selected_attributes(self):
+        m = self.stream_input('''
+        CREATE TABLE A (Id INTEGER, Name STRING);
+        CREATE TABLE B (Id INTEGER, A_Id INTEGER, Name STRING);
+        INSERT INTO A VALUES (1, 'a');
+        INSERT INTO B VALUES (2, 1, 'b');
+        INSERT INTO B (Name, A_Id, Id) VALUES ('c', 1, 3);
+        CREATE ROP REF_ID R1 FROM MC B (A_Id) TO 1 A (Id);
+        ''', attributes={'A': [], 'B': ['Name']})
+        a = m.select_any('A')
+        self.assertIsNone(a.Name)
+        self.assertEqual(a.Id, 1)
+        
+        bs = m.select_many('B')
+        self.assertEqual([b.Name for b in bs], ['b', 'c'])
+        for b in bs:
+            self.assertEqual(b.A_Id, 1)
+            self.assertEqual(xtuml.navigate_one(b).A[1](), a)
+        
+    def test_stream_line_numbers(self):
+        try:
+            self.stream_input('''CREATE TABLE A (Id INTEGER);
+            INSERT INTO A VALUES (1);
+            INSERT INTO A VALUES (2
+            );
+            INSERT INTO A VALUES (3) UNIQUE;''')
+        except xtuml.ParsingException as e:
+            self.assertIn(':5', str(e))
+        else:
+            self.fail('expected a parsing exception')
         
     @load_docstring
     def test_table_named_create(self, m):
@@ -332,6 +588,60 @@ class TestLoader(unittest.TestCase):
         y = xtuml.navigate_one(x).Y[1]()
         self.assertTrue(y is not None)
 
+    @load_docstring
+    def test_insert_with_comments(self, m):
+        '''
+        CREATE TABLE X (Id INTEGER, Name STRING, Value REAL);
+        insert into X values (
+            -- the id
+            - 1, -- Id : INTEGER
+            'a -- b;', -- Name : STRING
+            2.5 -- Value : REAL
+        );
+        '''
+        val = m.select_any('X')
+        self.assertEqual(val.Id, -1)
+        self.assertEqual(val.Name, 'a -- b;')
+        self.assertEqual(val.Value, 2.5)
+        
+    @load_docstring
+    def test_insert_named_values_in_varying_order(self, m):
+        '''
+        CREATE TABLE X (Id INTEGER, Name STRING, Value REAL);
+        INSERT INTO X (Id, Name, Value) VALUES (1, 'a', 1.5);
+        INSERT INTO X (Value, Id) VALUES (2.5, 2);
+        INSERT INTO X (Name, Value, Id) VALUES ('c', 3.5, 3);
+        INSERT INTO X (Id, Name, Value) VALUES (4, 'd', 4.5);
+        '''
+        values = [(x.Id, x.Name, x.Value) for x in m.select_many('X')]
+        self.assertEqual(sorted(values), [(1, 'a', 1.5),
+                                          (2, None, 2.5),
+                                          (3, 'c', 3.5),
+                                          (4, 'd', 4.5)])
+        
+    def test_consecutive_inputs_line_number(self):
+        loader = xtuml.ModelLoader()
+        loader.input('''CREATE TABLE X (Id INTEGER);
+                        CREATE TABLE Y (Id INTEGER);''', name='x.sql')
+        try:
+            loader.input('''CREATE TABLE Z (Id INTEGER);
+                            CREATE TABLE & (Id INTEGER);''', name='y.sql')
+        except xtuml.ParsingException as e:
+            self.assertEqual(str(e), "illegal character '&' at y.sql:2")
+        else:
+            self.fail('expected a parsing exception')
+        
+    def test_malformed_insert_line_number(self):
+        loader = xtuml.ModelLoader()
+        try:
+            loader.input('''INSERT INTO X VALUES (1);
+                            INSERT INTO X VALUES (2,
+                            3 4);''', name='x.sql')
+        except xtuml.ParsingException as e:
+            self.assertEqual(str(e), 'illegal token NUMBER (4) at x.sql:3')
+        else:
+            self.fail('expected a parsing exception')
+    
     @load_docstring
     def test_empty_input(self, m):
         ''''''
@@ -453,6 +763,65 @@ class TestLoader(unittest.TestCase):
         self.assertEqual(x.VAR2, True)
         self.assertEqual(x.VAR3, 5)
 
+    @load_docstring
+    def test_insert_into_unspecialized_class(self, m):
+        '''
+        CREATE TABLE X (VAR1 STRING, VAR2 BOOLEAN, VAR3 INTEGER);
+        INSERT INTO X VALUES ('test', TRUE, 5);
+        '''
+        x = m.select_any('X')
+        self.assertFalse(m.find_metaclass('X').specialized)
+        x.extra = 1
+        self.assertEqual(vars(x)['extra'], 1)
+        self.assertIs(weakref.ref(x)(), x)
+        
+        m.find_metaclass('X').append_attribute('VAR4', 'integer')
+        x.VAR4 = 4
+        self.assertEqual(x.var4, 4)
+
+    def test_insert_into_specialized_class(self):
+        loader = xtuml.ModelLoader(specialize=True)
+        loader.input('''
+        CREATE TABLE X (VAR1 STRING, VAR2 BOOLEAN, VAR3 INTEGER);
+        INSERT INTO X VALUES ('test', TRUE, 5);
+        ''')
+        m = loader.build_metamodel()
+        x = m.select_any('X')
+        self.assertEqual(('VAR1', 'VAR2', 'VAR3', '__weakref__'),
+                         type(x).__slots__)
+        self.assertEqual(x.VAR1, 'test')
+        self.assertEqual(x.var2, True)
+        self.assertEqual(x.VAR3, 5)
+        self.assertFalse(hasattr(x, '__dict__'))
+        self.assertIs(weakref.ref(x)(), x)
+
+    def test_insert_into_specialized_class_with_association(self):
+        loader = xtuml.ModelLoader(specialize=True)
+        loader.input('''
+        CREATE TABLE X (Id INTEGER, Y_Id INTEGER);
+        CREATE TABLE Y (Id INTEGER);
+        CREATE ROP REF_ID R1 FROM 1C X (Y_Id) TO 1 Y (Id);
+        INSERT INTO X VALUES (1, 2);
+        INSERT INTO Y VALUES (2);
+        ''')
+        m = loader.build_metamodel()
+        x = m.select_any('X')
+        self.assertFalse(hasattr(x, '__dict__'))
+        self.assertEqual(x.Y_Id, 2)
+        self.assertEqual(xtuml.navigate_one(x).Y[1]().Id, 2)
+        self.assertFalse(m.find_metaclass('X').raw_values['Y_Id'])
+
+    @load_docstring
+    def test_insert_incomplete_positional_values(self, m):
+        '''
+        CREATE TABLE X (VAR1 STRING, VAR2 STRING, VAR3 UNIQUE_ID);
+        INSERT INTO X VALUES ('test');
+        '''
+        x = m.select_any('X')
+        self.assertEqual(x.VAR1, 'test')
+        self.assertEqual(x.VAR2, '')
+        self.assertIsNotNone(x.VAR3)
+
     @load_docstring
     def test_insert_incomplete_named_values(self, m):
         '''
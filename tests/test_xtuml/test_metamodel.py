@@ -225,6 +225,20 @@ class TestModel(unittest.TestCase):
         inst = self.metamodel.select_any('S_DT', where(Name='void'))
         self.assertFalse(inst)
     
+    def test_delete_preserves_order(self):
+        self.metamodel.define_class('A', [('Number', 'integer')])
+        for number in range(10):
+            self.metamodel.new('A', Number=number)
+
+        for inst in self.metamodel.select_many('A', lambda sel: sel.Number % 3):
+            xtuml.delete(inst)
+
+        q = self.metamodel.select_many('A')
+        self.assertEqual([0, 3, 6, 9], [inst.Number for inst in q])
+
+        inst = self.metamodel.new('A', Number=10)
+        self.assertEqual(inst, self.metamodel.select_many('A').last)
+
     def test_delete_twise(self):
         inst = self.metamodel.select_any('S_DT', where(Name='void'))
         xtuml.delete(inst)
@@ -327,6 +341,330 @@ class TestDefineAssociations(unittest.TestCase):
         
         self.assertEqual(a, xtuml.navigate_one(b).A[1]())
 
+    def test_bulk_new(self):
+        self.metamodel.define_class('A', [('Id', 'unique_id'), ('Name', 'string')])
+        self.metamodel.define_class('B', [('Id', 'unique_id'),
+                                          ('A_Id', 'unique_id'),
+                                          ('Number', 'integer')])
+        
+        ass = self.metamodel.define_association(rel_id=1, 
+                                                source_kind='B', 
+                                                source_keys=['A_Id'], 
+                                                source_many=True, 
+                                                source_conditional=True,
+                                                source_phrase='',
+                                                target_kind='A',
+                                                target_keys=['Id'],
+                                                target_many=False,
+                                                target_conditional=False,
+                                                target_phrase='')
+        ass.formalize()
+        
+        a1, a2 = self.metamodel.bulk_new('A', rows=[(1, 'First'), (2,)])
+        self.assertEqual(a1.Id, 1)
+        self.assertEqual(a1.Name, 'First')
+        self.assertEqual(a2.Id, 2)
+        self.assertEqual(a2.Name, '')
+        
+        insts = self.metamodel.bulk_new('B', columns={'a_id': [1, 2, 1, 3],
+                                                      'Number': [4, 5, 6, 7]})
+        self.assertEqual(len(insts), 4)
+        self.assertEqual([inst.Number for inst in insts], [4, 5, 6, 7])
+        self.assertEqual([inst.A_Id for inst in insts], [1, 2, 1, None])
+        self.assertTrue(all(inst.Id for inst in insts))
+        
+        self.assertEqual(xtuml.navigate_one(insts[0]).A[1](), a1)
+        self.assertEqual(xtuml.navigate_one(insts[1]).A[1](), a2)
+        self.assertEqual(len(xtuml.navigate_many(a1).B[1]()), 2)
+        self.assertIsNone(xtuml.navigate_one(insts[3]).A[1]())
+        self.assertFalse(self.metamodel.find_metaclass('B').raw_values['A_Id'])
+        self.assertFalse(self.metamodel.find_metaclass('B').specialized)
+        
+        self.assertEqual(self.metamodel.select_one('B', where(Number=6)), insts[2])
+        self.assertRaises(xtuml.MetaException, self.metamodel.bulk_new, 'B',
+                          columns={'Id': [1, 2], 'Number': [1]})
+        
+    def test_batch_relate(self):
+        self.metamodel.define_class('A', [('Id', 'unique_id')])
+        self.metamodel.define_class('B', [('Id', 'unique_id'), ('A_Id', 'unique_id')])
+        
+        self.metamodel.define_association(rel_id=1, 
+                                          source_kind='B', 
+                                          source_keys=['A_Id'], 
+                                          source_many=True, 
+                                          source_conditional=True,
+                                          source_phrase='',
+                                          target_kind='A',
+                                          target_keys=['Id'],
+                                          target_many=False,
+                                          target_conditional=False,
+                                          target_phrase='')
+        a1 = self.metamodel.new('A')
+        a2 = self.metamodel.new('A')
+        b1 = self.metamodel.new('B', A_Id=a1.Id)
+        b2 = self.metamodel.new('B', A_Id=a1.Id)
+        b3 = self.metamodel.new('B')
+        
+        self.metamodel.batch_relate()
+        self.assertEqual(a1, xtuml.navigate_one(b1).A[1]())
+        self.assertEqual(a1, xtuml.navigate_one(b2).A[1]())
+        self.assertIsNone(xtuml.navigate_one(b3).A[1]())
+        self.assertEqual(len(xtuml.navigate_many(a1).B[1]()), 2)
+        
+        b2.A_Id = a2.Id
+        b3.A_Id = a2.Id
+        self.metamodel.batch_relate()
+        self.assertEqual(a1, xtuml.navigate_one(b1).A[1]())
+        self.assertEqual(a2, xtuml.navigate_one(b2).A[1]())
+        self.assertEqual(a2, xtuml.navigate_one(b3).A[1]())
+        self.assertEqual(len(xtuml.navigate_many(a1).B[1]()), 1)
+        self.assertEqual(len(xtuml.navigate_many(a2).B[1]()), 2)
+
+    def test_association_batch_relate_indices(self):
+        self.metamodel.define_class('A', [('Id', 'integer')])
+        self.metamodel.define_class('B', [('Id', 'integer'), ('A_Id', 'integer')])
+        self.metamodel.define_class('C', [('Name', 'string')])
+        ass = self.metamodel.define_association(1, 'B', ['A_Id'], True, True, '',
+                                                'A', ['Id'], False, False, '')
+        a_index = self.metamodel.define_index('A', 'Id')
+        b_index = self.metamodel.define_index('B', 'A_Id')
+        c_index = self.metamodel.define_index('C', 'Name')
+        a = self.metamodel.new('A', Id=1)
+        b = self.metamodel.new('B', Id=2, A_Id=1)
+        self.metamodel.new('C', Name='c')
+        for kind, args in [('A', dict(Id=1)), ('B', dict(A_Id=1)),
+                           ('C', dict(Name='c'))]:
+            self.assertTrue(self.metamodel.select_any(kind, where(**args)))
+        
+        ass.batch_relate()
+        self.assertEqual(a, xtuml.navigate_one(b).A[1]())
+        self.assertFalse(a_index.populated)
+        self.assertFalse(b_index.populated)
+        self.assertTrue(c_index.populated)
+        
+    def test_batch_relate_formalized(self):
+        loader = xtuml.ModelLoader()
+        loader.input('''
+        CREATE TABLE A (Id INTEGER);
+        CREATE TABLE B (Id INTEGER, A_Id INTEGER);
+        CREATE ROP REF_ID R1 FROM MC B (A_Id) TO 1 A (Id);
+        INSERT INTO A VALUES (1);
+        INSERT INTO A VALUES (2);
+        INSERT INTO B VALUES (3, 1);
+        INSERT INTO B VALUES (4, 1);
+        ''')
+        m = loader.build_metamodel()
+        a1 = m.select_one('A', where(Id=1))
+        a2 = m.select_one('A', where(Id=2))
+        b3 = m.select_one('B', where(Id=3))
+        b4 = m.select_one('B', where(Id=4))
+        
+        b_class = m.find_metaclass('B')
+        self.assertRaises(xtuml.MetaException, setattr, b3, 'A_Id', 2)
+        self.assertRaises(xtuml.MetaException, b_class.set_raw_value, b3,
+                          'Id', 2)
+        
+        b_class.set_raw_value(b3, 'a_id', 2)
+        self.assertEqual(b3.A_Id, 1)
+        m.batch_relate()
+        self.assertEqual(b3.A_Id, 2)
+        self.assertEqual(a2, xtuml.navigate_one(b3).A[1]())
+        self.assertEqual(a1, xtuml.navigate_one(b4).A[1]())
+        self.assertEqual(m.select_one('B', where(A_Id=2)), b3)
+        self.assertFalse(b_class.raw_values['A_Id'])
+        
+    def test_batch_relate_with_composite_keys(self):
+        self.metamodel.define_class('A', [('X', 'integer'), ('Y', 'integer')])
+        self.metamodel.define_class('B', [('X', 'integer'), ('Y', 'integer')])
+        self.metamodel.define_class('C', [('CX', 'integer'), ('CY', 'integer')])
+        self.metamodel.define_association(rel_id=1, 
+                                          source_kind='B', 
+                                          source_keys=['X', 'Y'], 
+                                          source_many=True, 
+                                          source_conditional=True,
+                                          source_phrase='',
+                                          target_kind='A',
+                                          target_keys=['X', 'Y'],
+                                          target_many=False,
+                                          target_conditional=False,
+                                          target_phrase='')
+        self.metamodel.define_association(rel_id=2, 
+                                          source_kind='C', 
+                                          source_keys=['CY', 'CX'], 
+                                          source_many=True, 
+                                          source_conditional=True,
+                                          source_phrase='',
+                                          target_kind='A',
+                                          target_keys=['Y', 'X'],
+                                          target_many=False,
+                                          target_conditional=False,
+                                          target_phrase='')
+        a1 = self.metamodel.new('A', X=1, Y=2)
+        a2 = self.metamodel.new('A', X=2, Y=1)
+        b = self.metamodel.new('B', X=2, Y=1)
+        c = self.metamodel.new('C', CX=1, CY=2)
+        
+        timings = dict()
+        self.metamodel.batch_relate(timings)
+        self.assertEqual(a2, xtuml.navigate_one(b).A[1]())
+        self.assertEqual(a1, xtuml.navigate_one(c).A[2]())
+        self.assertEqual(sorted(timings), ['clear', 'connect', 'index'])
+
+
+class TestUniqueIdentifierIndex(unittest.TestCase):
+    '''
+    Test suite for hash indices backing unique identifiers
+    '''
+
+    def setUp(self):
+        self.metamodel = xtuml.MetaModel()
+        self.metamodel.define_class('A', [('Id', 'unique_id'),
+                                          ('Name', 'string')])
+        self.metamodel.define_class('B', [('Id', 'unique_id'),
+                                          ('A_Id', 'unique_id')])
+        self.metamodel.define_unique_identifier('A', 1, 'Id')
+        self.metamodel.define_unique_identifier('B', 1, 'A_Id')
+        ass = self.metamodel.define_association(rel_id=1,
+                                                source_kind='B',
+                                                source_keys=['A_Id'],
+                                                source_many=False,
+                                                source_conditional=True,
+                                                source_phrase='',
+                                                target_kind='A',
+                                                target_keys=['Id'],
+                                                target_many=False,
+                                                target_conditional=False,
+                                                target_phrase='')
+        ass.formalize()
+
+    def tearDown(self):
+        del self.metamodel
+
+    def test_select_by_identifier(self):
+        a1 = self.metamodel.new('A', Name='First')
+        a2 = self.metamodel.new('A', Name='Second')
+
+        self.assertEqual(a1, self.metamodel.select_one('A', where(Id=a1.Id)))
+        self.assertEqual(a2, self.metamodel.select_one('A', where(ID=a2.Id)))
+
+        metaclass = self.metamodel.find_metaclass('A')
+        self.assertTrue(metaclass.find_index(['Id']).populated)
+
+        a3 = self.metamodel.new('A', Name='Third')
+        q = self.metamodel.select_many('A', where(Id=a3.Id))
+        self.assertEqual(q, [a3])
+
+    def test_attribute_assignment(self):
+        a = self.metamodel.new('A')
+        old_id = a.Id
+        self.assertEqual(a, self.metamodel.select_one('A', where(Id=old_id)))
+
+        a.Id = 5
+        self.assertIsNone(self.metamodel.select_one('A', where(Id=old_id)))
+        self.assertEqual(a, self.metamodel.select_one('A', where(Id=5)))
+
+    def test_delete(self):
+        a = self.metamodel.new('A')
+        self.assertEqual(a, self.metamodel.select_one('A', where(Id=a.Id)))
+
+        xtuml.delete(a)
+        self.assertIsNone(self.metamodel.select_one('A', where(Id=a.Id)))
+
+    def test_referential_identifier(self):
+        a = self.metamodel.new('A')
+        b = self.metamodel.new('B')
+        self.assertIsNone(self.metamodel.select_one('B', where(A_Id=a.Id)))
+
+        self.assertTrue(xtuml.relate(a, b, 1))
+        self.assertEqual(b, self.metamodel.select_one('B', where(A_Id=a.Id)))
+
+        a.Id = 5
+        self.assertEqual(b, self.metamodel.select_one('B', where(A_Id=5)))
+
+        self.assertTrue(xtuml.unrelate(a, b, 1))
+        self.assertIsNone(self.metamodel.select_one('B', where(A_Id=5)))
+
+    def test_several_referring_associations(self):
+        self.metamodel.define_class('C', [('A_Id', 'unique_id')])
+        self.metamodel.define_unique_identifier('C', 1, 'A_Id')
+        ass = self.metamodel.define_association(rel_id=2,
+                                                source_kind='C',
+                                                source_keys=['A_Id'],
+                                                source_many=False,
+                                                source_conditional=True,
+                                                source_phrase='',
+                                                target_kind='A',
+                                                target_keys=['Id'],
+                                                target_many=False,
+                                                target_conditional=False,
+                                                target_phrase='')
+        ass.formalize()
+
+        a = self.metamodel.new('A')
+        b = self.metamodel.new('B', A_Id=a.Id)
+        c = self.metamodel.new('C', A_Id=a.Id)
+
+        a.Id = 5
+        self.assertEqual(b, self.metamodel.select_one('B', where(A_Id=5)))
+        self.assertEqual(c, self.metamodel.select_one('C', where(A_Id=5)))
+
+    def test_new_with_referential_attribute(self):
+        a = self.metamodel.new('A')
+        b = self.metamodel.new('B', A_Id=a.Id)
+        self.assertEqual(a, xtuml.navigate_one(b).A[1]())
+        self.assertEqual(b, self.metamodel.select_one('B', where(A_Id=a.Id)))
+
+
+class TestSecondaryIndex(unittest.TestCase):
+    '''
+    Test suite for user-defined secondary indices
+    '''
+
+    def setUp(self):
+        self.metamodel = xtuml.MetaModel()
+        self.metamodel.define_class('A', [('Id', 'unique_id'),
+                                          ('Name', 'string'),
+                                          ('Number', 'integer')])
+        self.metamodel.define_index('A', 'Name')
+
+    def tearDown(self):
+        del self.metamodel
+
+    def test_select_many(self):
+        a1 = self.metamodel.new('A', Name='x', Number=1)
+        a2 = self.metamodel.new('A', Name='y', Number=2)
+        a3 = self.metamodel.new('A', Name='x', Number=3)
+
+        q = self.metamodel.select_many('A', where(Name='x'))
+        self.assertEqual(q, [a1, a3])
+
+        q = self.metamodel.select_many('A', where(Name='y'))
+        self.assertEqual(q, [a2])
+
+        q = self.metamodel.select_many('A', where(Name='x', Number=3))
+        self.assertEqual(q, [a3])
+
+        q = self.metamodel.select_many('A', lambda sel: sel.Number > 1,
+                                       where(name='x'))
+        self.assertEqual(q, [a3])
+
+    def test_attribute_assignment(self):
+        a = self.metamodel.new('A', Name='x')
+        self.assertEqual(a, self.metamodel.select_any('A', where(Name='x')))
+
+        a.name = 'y'
+        self.assertIsNone(self.metamodel.select_any('A', where(Name='x')))
+        self.assertEqual(a, self.metamodel.select_any('A', where(Name='y')))
+
+    def test_bridgepoint_indices(self):
+        m = ooaofooa.load_metamodel()
+        metaclass = m.find_metaclass('S_DT')
+        self.assertIsNotNone(metaclass.find_index(['Name']))
+
+        s_dt = m.select_any('S_DT', where(Name='integer'))
+        self.assertEqual(s_dt.Name, 'integer')
+        self.assertTrue(metaclass.find_index(['Name']).populated)
+
 
 class TestClass(unittest.TestCase):
     '''
@@ -415,6 +753,89 @@ class TestMetaClass(unittest.TestCase):
         
         self.assertEqual(inst1.number, 2)
         self.assertEqual(inst1.name, 'test')
+
+    def test_attribute_type(self):
+        self.metaclass.append_attribute('Number', 'integer')
+        self.metaclass.append_attribute('Name', 'string')
+        self.assertEqual(self.metaclass.attribute_type('number'), 'integer')
+        self.assertEqual(self.metaclass.attribute_type('NAME'), 'string')
+        self.assertIsNone(self.metaclass.attribute_type('Email'))
+        
+        self.metaclass.insert_attribute(0, 'Email', 'string')
+        self.assertEqual(self.metaclass.attribute_type('email'), 'string')
+        
+        self.metaclass.delete_attribute('Name')
+        self.assertIsNone(self.metaclass.attribute_type('name'))
+        
+        self.metaclass.append_attribute('Name', 'unique_id')
+        self.assertEqual(self.metaclass.attribute_type('name'), 'unique_id')
+
+    def test_case_insensitive_attributes(self):
+        self.metaclass.append_attribute('Number', 'integer')
+        inst = self.metaclass(number=2)
+        self.assertEqual(inst.Number, 2)
+        self.assertEqual(inst.NUMBER, 2)
+
+        inst.nUMBER = 3
+        self.assertEqual(inst.Number, 3)
+        self.assertNotIn('nUMBER', inst.__dict__)
+
+    def test_allocate(self):
+        self.metaclass.append_attribute('Number', 'integer')
+        inst = self.metaclass.allocate()
+        self.assertIn(inst, self.metaclass.select_many())
+        self.assertRaises(AttributeError, getattr, inst, 'Number')
+        
+    def test_specialize(self):
+        self.metaclass.append_attribute('Number', 'integer')
+        self.metaclass.append_attribute('Name', 'string')
+        self.metaclass.specialize()
+        self.assertEqual(('Number', 'Name', '__weakref__'),
+                         self.metaclass.clazz.__slots__)
+
+        inst = self.metaclass(Number=2, name='test')
+        self.assertIsInstance(inst, xtuml.Class)
+        self.assertEqual(type(inst).__name__, 'Test')
+        self.assertEqual(inst.number, 2)
+        self.assertEqual(inst.Name, 'test')
+        self.assertFalse(hasattr(inst, '__dict__'))
+        self.assertRaises(AttributeError, setattr, inst, 'Email', 'test')
+        self.assertRaises(xtuml.MetaException, self.metaclass.append_attribute,
+                          'Email', 'string')
+
+    def test_specialize_and_append_attribute(self):
+        self.metaclass.append_attribute('Number', 'integer')
+        self.metaclass.specialize()
+        self.metaclass.append_attribute('Email', 'string')
+        self.assertEqual(('Number', 'Email', '__weakref__'),
+                         self.metaclass.clazz.__slots__)
+        
+        inst = self.metaclass(Number=2, Email='test@test.com')
+        self.assertEqual(inst.email, 'test@test.com')
+        self.assertFalse(hasattr(inst, '__dict__'))
+
+    def test_formalize_specialized_class(self):
+        m = xtuml.MetaModel()
+        m.define_class('A', [('Id', 'integer')])
+        b_class = m.define_class('B', [('Id', 'integer'), ('A_Id', 'integer')])
+        b_class.specialize()
+        a = m.new('A', Id=1)
+        b = m.new('B', Id=2, A_Id=1)
+        
+        ass = m.define_association(1, 'B', ['A_Id'], False, False, '',
+                                   'A', ['Id'], False, False, '')
+        ass.formalize()
+        self.assertEqual(b_class.raw_values['A_Id'], {b: 1})
+        
+        m.batch_relate()
+        self.assertFalse(b_class.raw_values['A_Id'])
+        self.assertEqual(xtuml.navigate_one(b).A[1](), a)
+        self.assertEqual(b.A_Id, 1)
+
+    def test_specialize_with_instances(self):
+        self.metaclass.append_attribute('Number', 'integer')
+        self.metaclass.new()
+        self.assertRaises(xtuml.MetaException, self.metaclass.specialize)
         
         
 class TestQuerySet(unittest.TestCase):
@@ -439,6 +860,131 @@ class TestQuerySet(unittest.TestCase):
         q = xtuml.QuerySet([2])
         self.assertEqual(q.first, 2)
         self.assertEqual(q.last, 2)
+
+
+class TestQuery(unittest.TestCase):
+    '''
+    Test suite for the class xtuml.Query
+    '''
+    def setUp(self):
+        self.metamodel = xtuml.MetaModel()
+        self.metamodel.define_class('A', [('Id', 'unique_id'),
+                                          ('Name', 'string'),
+                                          ('Number', 'integer')])
+        self.metamodel.define_index('A', 'Name')
+        for name, number in [('b', 2), ('a', 1), ('c', 2), ('a', 3), ('b', 1)]:
+            self.metamodel.new('A', Name=name, Number=number)
+
+    def tearDown(self):
+        del self.metamodel
+
+    def test_select_many_at_call_time(self):
+        q = self.metamodel.select_many('A')
+        self.assertNotIsInstance(q, xtuml.Query)
+        self.metamodel.new('A')
+        self.assertEqual(len(q), 5)
+        
+        q = self.metamodel.select_many('A', where(Number=3))
+        q.first.Number = 4
+        self.assertEqual(len(q), 1)
+        
+    def test_lazy_evaluation(self):
+        q = self.metamodel.select_lazily('A')
+        self.assertIsInstance(q, xtuml.Query)
+        self.assertFalse(q.evaluated)
+        
+        self.metamodel.new('A')
+        self.assertEqual(len(q), 6)
+        self.assertTrue(q.evaluated)
+
+        self.metamodel.new('A')
+        self.assertEqual(len(q), 6)
+        
+    def test_where(self):
+        q = self.metamodel.select_lazily('A').where(Name='a')
+        self.assertEqual([inst.Number for inst in q], [1, 3])
+        self.assertEqual(len(q.where(Number=3)), 1)
+
+    def test_filter(self):
+        q = self.metamodel.select_lazily('A').filter(lambda sel: sel.Number > 1)
+        self.assertEqual([inst.Name for inst in q], ['b', 'c', 'a'])
+        
+    def test_limit(self):
+        q = self.metamodel.select_lazily('A')
+        self.assertEqual([inst.Name for inst in q.limit(2)], ['b', 'a'])
+        self.assertEqual(len(q.limit(2).limit(3)), 2)
+        self.assertEqual(len(q.limit(0)), 0)
+        
+    def test_first_and_last(self):
+        queries = [self.metamodel.select_lazily('A'),
+                   self.metamodel.select_lazily('A').where(Name='b'),
+                   self.metamodel.select_lazily('A').order_by('Number'),
+                   self.metamodel.select_lazily('A').reverse_order_by('Number'),
+                   self.metamodel.select_lazily('A').order_by('Number').limit(3),
+                   self.metamodel.select_lazily('A', order_by('Name'),
+                                              reverse_order_by('Number')),
+                   self.metamodel.select_lazily('A', where(Name='z'))]
+        
+        for q in queries:
+            expected = list(xtuml.QuerySet(q._evaluate()))
+            self.assertEqual(q.first, next(iter(expected), None))
+            self.assertEqual(q.last, next(reversed(expected), None))
+            self.assertFalse(q.evaluated)
+            
+    def test_top_n(self):
+        q = self.metamodel.select_lazily('A').order_by('Number').limit(3)
+        self.assertEqual([(inst.Name, inst.Number) for inst in q],
+                         [('a', 1), ('b', 1), ('b', 2)])
+
+        q = self.metamodel.select_lazily('A').reverse_order_by('Number').limit(3)
+        self.assertEqual([(inst.Name, inst.Number) for inst in q],
+                         [('a', 3), ('b', 2), ('c', 2)])
+
+    def test_select_one_ordered_by(self):
+        inst = self.metamodel.select_one('A', order_by('Number'))
+        self.assertEqual((inst.Name, inst.Number), ('a', 1))
+        
+        inst = self.metamodel.select_one('A', reverse_order_by('Number'))
+        self.assertEqual((inst.Name, inst.Number), ('a', 3))
+
+        inst = self.metamodel.select_one('A', order_by('Number', 'Name'))
+        self.assertEqual((inst.Name, inst.Number), ('a', 1))
+        
+        inst = self.metamodel.select_one('A', order_by('Name'),
+                                         reverse_order_by('Number'))
+        self.assertEqual((inst.Name, inst.Number), ('a', 3))
+
+    def test_order_by_limit(self):
+        insts = self.metamodel.select_lazily('A')
+        for op in [order_by('Number'), reverse_order_by('Number'),
+                   order_by('Name', 'Number'), reverse_order_by('Name')]:
+            for limit in range(7):
+                self.assertEqual(op(insts, limit), op(insts)[:limit])
+                
+    def test_set_operations(self):
+        q1 = self.metamodel.select_lazily('A').where(Name='a')
+        q2 = self.metamodel.select_lazily('A').where(Name='b')
+        self.assertEqual(len(q1 | q2), 4)
+        self.assertEqual(len(q1 & q2), 0)
+        self.assertIsInstance(q1 | q2, xtuml.QuerySet)
+
+    def test_navigate(self):
+        m = ooaofooa.Loader().build_metamodel()
+        s_cdt = m.select_many('S_CDT')
+        q = xtuml.navigate_many(s_cdt).S_DT[17].lazy().order_by('Name')
+        self.assertIsInstance(q, xtuml.Query)
+        self.assertEqual(q.first.Name, 'boolean')
+        self.assertEqual(q.last.Name, 'void')
+        
+        q = xtuml.navigate_many(s_cdt).S_DT[17]()
+        self.assertNotIsInstance(q, xtuml.Query)
+        self.assertEqual(len(q), len(s_cdt))
+        
+        chain = xtuml.navigate_many(s_cdt).S_DT[1]
+        self.assertRaises(xtuml.UnknownLinkException, chain)
+        
+        chain = xtuml.navigate_many(s_cdt).S_DT[1]
+        self.assertRaises(xtuml.UnknownLinkException, chain.lazy)
         
         
 if __name__ == "__main__":
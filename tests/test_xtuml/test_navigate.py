@@ -62,6 +62,51 @@ class TestNavigation(unittest.TestCase):
         inst = xtuml.navigate_one(pe_pe).S_SYS[9100]()
         self.assertEqual(inst, s_sys)
         
+    def test_navigate_heterogeneous(self):
+        s_dt = self.m.select_any('S_DT', xtuml.where_eq(Name='void'))
+        ep_pkg = self.m.new('EP_PKG')
+        pe_pe = self.m.new('PE_PE')
+        self.assertTrue(xtuml.relate(ep_pkg, pe_pe, 8001))
+        
+        handle = [ep_pkg, s_dt, ep_pkg]
+        insts = xtuml.navigate_many(handle).PE_PE[8001]()
+        self.assertEqual(list(insts), [pe_pe, xtuml.navigate_one(s_dt).PE_PE[8001]()])
+        
+    def test_navigate_compiled_path(self):
+        s_dt = self.m.select_any('S_DT', xtuml.where_eq(Name='void'))
+        metaclass = xtuml.get_metaclass(s_dt)
+        path = (('PE_PE', 'R8001', ''), ('S_DT', 'R8001', ''))
+        hops = metaclass.compile_path(path)
+        
+        self.assertEqual(len(hops), 2)
+        self.assertIs(hops, metaclass.compile_path(path))
+        self.assertEqual(s_dt, xtuml.navigate_one(s_dt).PE_PE[8001].S_DT[8001]())
+        
+    def test_navigate_unknown_path(self):
+        s_dt = self.m.select_any('S_DT', xtuml.where_eq(Name='void'))
+        chain = xtuml.navigate_one(s_dt).PE_PE[8001].S_SYNC[17]
+        self.assertRaises(xtuml.UnknownLinkException, chain)
+        
+    def test_navigate_many_deduplicated(self):
+        act_blk1 = self.m.new('ACT_BLK')
+        act_blk2 = self.m.new('ACT_BLK')
+        for act_blk in [act_blk1, act_blk2, act_blk1]:
+            act_smt = self.m.new('ACT_SMT')
+            self.assertTrue(xtuml.relate(act_smt, act_blk, 602))
+            
+        handle = [act_blk2, act_blk1, act_blk2]
+        act_smts = xtuml.navigate_many(handle).ACT_SMT[602]()
+        self.assertEqual(len(act_smts), 3)
+        
+        act_blks = xtuml.navigate_many(handle).ACT_SMT[602].ACT_BLK[602]()
+        self.assertEqual(list(act_blks), [act_blk2, act_blk1])
+        
+        act_blk = xtuml.navigate_any(handle).ACT_SMT[602].ACT_BLK[602]()
+        self.assertEqual(act_blk, act_blk2)
+        
+        act_blk = xtuml.navigate_any(handle).ACT_SMT[602].ACT_BLK[602](lambda sel: sel != act_blk2)
+        self.assertEqual(act_blk, act_blk1)
+        
     def test_navigate_none(self):
         self.assertIsNone(xtuml.navigate_one(None)())
         self.assertIsNone(xtuml.navigate_subtype(None, 0))
@@ -18,11 +18,17 @@
 
 import unittest
 import os
+import shutil
 import tempfile
 import atexit
 
 import xtuml
     
+try:
+    import lzma
+except ImportError:
+    lzma = None
+
 
 class TestPersist(unittest.TestCase):
     '''
@@ -190,6 +196,60 @@ class TestPersist(unittest.TestCase):
         finally:
             atexit.register(os.remove, filename)
 
+    def test_persist_compressed_database(self):
+        schema = '''
+            CREATE TABLE X (Id INTEGER, Name STRING);
+        '''
+        loader = xtuml.ModelLoader()
+        loader.input(schema)
+        m = loader.build_metamodel()
+        m.new('X', Id=1, Name='x')
+        
+        s = xtuml.serialize(m)
+        for suffix in ['.gz', '.bz2']:
+            (_, filename) = tempfile.mkstemp(suffix=suffix)
+            try:
+                xtuml.persist_database(m, filename)
+                with open(filename, 'rb') as f:
+                    self.assertNotEqual(s.encode(), f.read())
+                    
+                m2 = xtuml.load_metamodel(filename)
+                self.assertEqual(s, xtuml.serialize(m2))
+            finally:
+                atexit.register(os.remove, filename)
+
+    @unittest.skipIf(lzma is None, 'xz compression is not supported')
+    def test_persist_xz_compressed_database(self):
+        loader = xtuml.ModelLoader()
+        loader.input('CREATE TABLE X (Id INTEGER, Name STRING);')
+        m = loader.build_metamodel()
+        m.new('X', Id=1, Name='x')
+        
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, 'model.sql.xz')
+            xtuml.persist_database(m, filename)
+            self.assertEqual(xtuml.tools.find_compression(filename), 'lzma')
+            
+            m2 = xtuml.load_metamodel(filename)
+            self.assertEqual(xtuml.serialize(m), xtuml.serialize(m2))
+        finally:
+            shutil.rmtree(directory)
+
+    @unittest.skipIf(lzma is not None, 'xz compression is supported')
+    def test_persist_unsupported_compression(self):
+        m = xtuml.MetaModel()
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, 'model.sql.xz')
+            self.assertRaises(IOError, xtuml.persist_database, m, filename)
+            
+            with open(filename, 'wb') as f:
+                f.write(b'\xfd7zXZ\x00')
+            self.assertRaises(IOError, xtuml.load_metamodel, filename)
+        finally:
+            shutil.rmtree(directory)
+
     def test_serialize_schema(self):
         schema = '''
             CREATE TABLE X (BOOLEAN BOOLEAN,
@@ -105,6 +105,12 @@ class TestRelateUnrelate(unittest.TestCase):
         s_edt = self.m.new('S_EDT')
         s_dt = self.m.new('S_DT')
         self.assertRaises(xtuml.UnknownLinkException, xtuml.relate, s_edt, s_dt, 0)
+
+    def test_relate_unrelated_kinds(self):
+        s_edt = self.m.new('S_EDT')
+        pe_pe = self.m.new('PE_PE')
+        self.assertRaises(xtuml.UnknownLinkException, xtuml.relate, s_edt, pe_pe, 17)
+        self.assertRaises(xtuml.UnknownLinkException, xtuml.relate, pe_pe, s_edt, 8001)
         
     def test_unrelate(self):
         inst1 = self.m.new('ACT_SMT')
@@ -53,6 +53,7 @@ from .meta import Association
 from .meta import Link
 
 from .meta import QuerySet
+from .meta import Query
 from .meta import Class
 from .meta import BaseObject
 from .meta import MetaClass
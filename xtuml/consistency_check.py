@@ -197,6 +197,15 @@ def main(args):
                       help="limit check for uniqueness constraint violations to one or more classes",
                       action="append", default=[])
     
+    parser.add_option("-j", "--jobs", dest="jobs", type='int', metavar="<number>",
+                      help="parse sql files using <number> processes in parallel",
+                      action="store", default=1)
+    
+    parser.add_option("--cache-dir", dest="cache_directory", metavar="<path>",
+                      help="cache parsed sql files in <path>, which must only be writable by "
+                           "trusted users since cached files are unpickled",
+                      action="store", default=None)
+    
     parser.add_option("-v", "--verbosity", dest='verbosity', action="count",
                       help="increase debug logging level", default=1)
     
@@ -213,9 +222,8 @@ def main(args):
     }
     logging.basicConfig(level=levels.get(opts.verbosity, logging.DEBUG))
     
-    loader = xtuml.ModelLoader()
-    for filename in args:
-        loader.filename_input(filename)
+    loader = xtuml.ModelLoader(opts.cache_directory)
+    loader.filenames_input(args, opts.jobs)
 
     m = loader.build_metamodel()
     
@@ -21,15 +21,31 @@ Loading support for xtUML models (based on sql).
 '''
 
 import uuid
+import collections
+import gc
+import hashlib
+import locale
 import logging
+import mmap
+import multiprocessing
 import os
 import re
+import sys
+import tempfile
+import time
+
+from functools import partial
 
 from ply import lex
 from ply import yacc
 
 import xtuml
 
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
 
 logger = logging.getLogger(__name__)
 
@@ -56,41 +72,114 @@ def guess_type_name(value):
         return 'UNIQUE_ID'
 
 
+def _deserialize_boolean(value):
+    if value.isdigit():
+        return bool(int(value))
+    elif value.upper() == 'FALSE':
+        return False
+    elif value.upper() == 'TRUE':
+        return True
+    else:
+        return None
+
+
+def _deserialize_integer(value):
+    if '"' in value:
+        return uuid.UUID(value[1:-1]).int
+    else:
+        return int(value)
+
+
+def _deserialize_real(value):
+    return float(value)
+
+
+def _deserialize_string(value):
+    return value[1:-1].replace("''", "'")
+
+
+_deserializers = {
+    'BOOLEAN': _deserialize_boolean,
+    'INTEGER': _deserialize_integer,
+    'REAL': _deserialize_real,
+    'STRING': _deserialize_string,
+    'UNIQUE_ID': _deserialize_integer,
+}
+
+
 def deserialize_value(ty, value):
     '''
     Deserialize a value of some type
     '''
-    uty = ty.upper()
-    
-    if uty == 'BOOLEAN':
-        if value.isdigit():
-            return bool(int(value))
-        elif value.upper() == 'FALSE':
-            return False
-        elif value.upper() == 'TRUE':
-            return True
-        else:
-            return None
-    
-    elif uty == 'INTEGER': 
-        if '"' in value:
-            return uuid.UUID(value[1:-1]).int
-        else:
-            return int(value)
-    
-    elif uty == 'REAL': 
-        return float(value)
-    
-    elif uty == 'STRING': 
-        return value[1:-1].replace("''", "'")
-    
-    elif uty == 'UNIQUE_ID': 
-        if '"' in value:
-            return uuid.UUID(value[1:-1]).int
-        else:
-            return int(value)
+    fn = _deserializers.get(ty.upper())
+    if fn:
+        return fn(value)
 
     
+def _keyword(word):
+    '''
+    Compile a case-insensitive regular expression for a reserved *word*.
+    '''
+    return ''.join('[%s%s]' % (c.upper(), c.lower()) for c in word) + r'(?!\w)'
+
+
+# Regular expressions that mirror the tokens defined by the ModelLoader, used
+# to recognize insert statements without invoking the parser.
+_SEP = r'[ \t\r\x0c\n]*(?:--[^\n]*\n[ \t\r\x0c\n]*)*'
+_IDENTIFIER = r'(?!R[0-9])[A-Za-z_][\w_]*(?!\w)'
+_VALUE = '|'.join([r"'[^']*(?:''[^']*)*'(?!')",
+                   r'"[^"\\\n]*(?:\\.[^"\\\n]*)*"',
+                   r'-?(?:\d+)(?:\.\d+)',
+                   r'-?[0-9]+',
+                   _keyword('TRUE'),
+                   _keyword('FALSE')])
+
+_insert_regex = re.compile(r"""
+    %(sep)s (?P<insert>%(insert)s) %(sep)s %(into)s %(sep)s
+    (?P<kind>%(identifier)s) %(sep)s
+    (?:\( (?P<names>%(sep)s (?:%(identifier)s %(sep)s
+                             (?:,%(sep)s %(identifier)s %(sep)s)*)?) \) %(sep)s)?
+    %(values)s %(sep)s
+    \( (?P<values>%(sep)s (?:(?:%(value)s) %(sep)s
+                           (?:,%(sep)s (?:%(value)s) %(sep)s)*)?) \) %(sep)s ;
+    """ % dict(sep=_SEP,
+               insert=_keyword('INSERT'),
+               into=_keyword('INTO'),
+               values=_keyword('VALUES'),
+               identifier=_IDENTIFIER,
+               value=_VALUE), re.VERBOSE)
+
+_identifier_item_regex = re.compile(r'%s(%s)%s,?' % (_SEP, _IDENTIFIER, _SEP))
+_value_item_regex = re.compile(r'%s(%s)%s,?' % (_SEP, _VALUE, _SEP))
+_separator_regex = re.compile(_SEP)
+_statement_regex = re.compile(r"""[^;'"\-]*
+                                  (?:(?:'[^']*(?:''[^']*)*'(?!')
+                                       |"[^"\\\n]*(?:\\.[^"\\\n]*)*"
+                                       |--[^\n]*(?![^\n])
+                                       |-(?!-))
+                                     [^;'"\-]*)*;""", re.VERBOSE)
+
+
+def _compile_binary(regex):
+    '''
+    Compile a *regex* which operates on text into one which operates on bytes,
+    e.g. the content of a memory-mapped file.
+    '''
+    return re.compile(regex.pattern.encode('ascii'), regex.flags & ~re.UNICODE)
+
+
+_text_regexes = (_insert_regex, _identifier_item_regex, _value_item_regex,
+                 _separator_regex, _statement_regex)
+_binary_regexes = tuple(_compile_binary(regex) for regex in _text_regexes)
+
+if sys.version_info[0] < 3:
+    _decode = str
+else:
+    def _decode(data):
+        # use the same encoding as open() does for files opened in text mode
+        return data.decode(locale.getpreferredencoding(False))
+
+
 class ParsingException(Exception):
     '''
     An exception that may be thrown while loading (and parsing) a metamodel.
@@ -161,6 +250,20 @@ class ModelLoader(object):
     >>> m1 = l.build_metamodel()
     >>> l.filename_input('additional_data.sql')
     >>> m2 = l.build_metamodel()
+    
+    A loader may also be switched into streaming mode, where statements are
+    populated into a metamodel as soon as they have been parsed rather than
+    being kept in memory by the loader.
+    
+    >>> l = xtuml.ModelLoader()
+    >>> m = l.stream()
+    >>> l.filename_input('schema.sql')
+    >>> l.filename_input('huge_data.sql')
+    >>> m = l.build_metamodel()
+    
+    A loader created with *specialize=True* stores attribute values of the
+    instances it populates in __slots__, which reduce their memory footprint
+    at the expense of flexibility, see *xtuml.MetaClass.specialize()*.
     '''
     reserved = (
         'CREATE',
@@ -198,48 +301,367 @@ class ModelLoader(object):
     # A string containing ignored characters (spaces and tabs).
     t_ignore = ' \t\r\x0c'
 
+    # The approximate number of characters parsed at a time in streaming mode.
+    chunk_size = 1 << 20
+    
     parser = None
     lexer = None
     statements = None
+    metamodel = None
+    keep_statements = True
+    pending = None
+    pending_kinds = None
+    deferred = None
+    cache_directory = None
+    lazy = False
+    specialize = False
+    kinds = None
+    attributes = None
+    decoders = None
+    projections = None
+    timings = None
     
-    def __init__(self):
+    def __init__(self, cache_directory=None, lazy=False, specialize=False):
         self.statements = list()
+        self.cache_directory = cache_directory
+        self.lazy = lazy
+        self.specialize = specialize
+        self.decoders = dict()
+        self.projections = dict()
+        self.timings = collections.OrderedDict()
         self.parser = yacc.yacc(debuglog=logger,
                                 errorlog=logger,
                                 optimize=1,
                                 module=self,
                                 outputdir=os.path.dirname(__file__),
                                 tabmodule='xtuml.__xtuml_parsetab')
+        
+        self.lexer = lex.lex(debuglog=logger,
+                             errorlog=logger,
+                             optimize=1,
+                             module=self,
+                             outputdir=os.path.dirname(__file__),
+                             lextab="xtuml.__xtuml_lextab")
+    
+    def stream(self, metamodel=None, keep_statements=False, kinds=None,
+               attributes=None):
+        '''
+        Switch the loader into streaming mode, where input is populated into a
+        *metamodel* as soon as it has been parsed, and return the metamodel.
+        If no metamodel is provided, a new one is created.
+        
+        Statements encountered earlier are populated immediately. Instances and
+        associations that refer to classes which are yet to be defined are kept
+        as pending, and populated in the order they were encountered once the
+        classes are defined, or when the metamodel is built.
+        
+        Optionally, *keep statements* in the loader after they have been
+        populated, e.g. to build additional metamodels from the same input.
+        The instances populated may also be restricted to some *kinds* and
+        *attributes*, see build_metamodel(). Since attributes that identify
+        instances or refer to other instances are not known until all input
+        has been parsed, instances of kinds with restricted attributes are
+        populated when the metamodel is built.
+        '''
+        if metamodel is None:
+            metamodel = xtuml.MetaModel()
+            
+        self.pending = list()
+        self.pending_kinds = set()
+        self.deferred = list()
+        self._select(kinds, attributes)
+        self._timed('classes', self.populate_classes, metamodel)
+        self._timed('unique_identifiers', self.populate_unique_identifiers,
+                    metamodel)
+        self._timed('associations', self.populate_associations, metamodel)
+        self._timed('instances', self.populate_instances, metamodel)
+        
+        if not keep_statements:
+            self.statements = list()
+
+        self.metamodel = metamodel
+        self.keep_statements = keep_statements
+        
+        return metamodel
     
     def input(self, data, name='<string>'):
         '''
         Parse *data* directly from a string. The *name* is used when reporting
         positional information if the parser encounter syntax errors.
         '''
-        lexer = lex.lex(debuglog=logger,
-                        errorlog=logger,
-                        optimize=1,
-                        module=self,
-                        outputdir=os.path.dirname(__file__),
-                        lextab="xtuml.__xtuml_lextab")
-        lexer.filename = name
+        self._add_statements(self._parse(data, name))
+        
+    def _parse(self, data, name, lineno=1):
+        '''
+        Parse *data* which starts at some *line number* in a file with some
+        *name*, and return the statements it contains.
+        
+        Insert statements are recognized using regular expressions, and any
+        other statements, including malformed insert statements, are handed
+        to the parser.
+        '''
+        started = time.time()
+        statements = list()
+        for batch in self._scan(data, name, lineno):
+            statements.extend(batch)
+            
+        self._record_timing('parse', time.time() - started)
+        return statements
+    
+    def _scan(self, data, name, lineno=1, size=None):
+        '''
+        Scan *data* which starts at some *line number* in a file with some
+        *name*, and yield the statements it contains in batches, each batch
+        covering approximately some *size* of the data, or all of it.
+        
+        The data is either text, or bytes such as the content of a memory-
+        mapped file. Bytes are not decoded as a whole, only the kind, names
+        and values of insert statements, and statements handed to the parser.
+        '''
+        if isinstance(data, (str, type(u''))):
+            regexes = _text_regexes
+            decode = None
+            count_lines = lambda start, end: data.count('\n', start, end)
+        else:
+            regexes = _binary_regexes
+            decode = _decode
+            count_lines = lambda start, end: data[start:end].count(b'\n')
+            
+        (insert_regex, identifier_item_regex, value_item_regex,
+         separator_regex, statement_regex) = regexes
+        
+        statements = list()
+        start = pos = flushed = 0
+        end = len(data)
+        while pos < end:
+            match = insert_regex.match(data, pos)
+            if match is None:
+                match = statement_regex.match(data, pos)
+                pos = match.end() if match else end
+                continue
+            
+            if start < pos:
+                self._scan_statements(statements, data[start:pos], decode,
+                                      name, lineno, start)
+                lineno += count_lines(start, pos)
+                start = pos
+            
+            offset = match.start('insert')
+            lineno += count_lines(start, offset)
+            
+            kind = match.group('kind')
+            names = match.group('names')
+            if names is not None:
+                names = identifier_item_regex.findall(names)
+            
+            values = value_item_regex.findall(match.group('values'))
+            if decode is not None:
+                kind = decode(kind)
+                names = names and [decode(name_) for name_ in names]
+                values = [decode(value) for value in values]
+                
+            stmt = CreateInstanceStmt(kind, values, names)
+            stmt.offset = offset
+            stmt.lineno = lineno
+            stmt.filename = name
+            statements.append(stmt)
+            
+            start = pos = match.end()
+            lineno += count_lines(offset, pos)
+            
+            if size is not None and pos - flushed >= size:
+                yield statements
+                statements = list()
+                flushed = pos
+
+        if separator_regex.match(data, start).end() < end:
+            self._scan_statements(statements, data[start:], decode, name,
+                                  lineno, start)
+        yield statements
+        
+    def _scan_statements(self, statements, data, decode, name, lineno, offset):
+        '''
+        Parse *data*, decoded using *decode* unless it is None, and add the
+        statements it contains to a list of *statements*. The data is located
+        at some *offset* and *line number* in a file with some *name*.
+        '''
+        if decode is not None:
+            data = decode(data)
+            
+        statements.extend(self._parse_statements(data, name, lineno, offset))
+    
+    def _parse_statements(self, data, name, lineno, offset):
+        '''
+        Parse *data* using the parser, and return the statements it contains.
+        The data is located at some *offset* and *line number* in a file with
+        some *name*.
+        '''
+        self.lexer.filename = name
+        self.lexer.lineno = lineno
         logger.debug('parsing %s' % name)
-        s = self.parser.parse(lexer=lexer, input=data, tracking=1)
-        self.statements.extend(s)
+        statements = self.parser.parse(lexer=self.lexer, input=data,
+                                       tracking=1)
+        for stmt in statements:
+            stmt.offset += offset
+            
+        return statements
 
+    def _add_statements(self, statements):
+        '''
+        Add parsed *statements* to the loader, or populate them into the
+        metamodel when the loader is in streaming mode.
+        '''
+        if self.metamodel is None:
+            self.statements.extend(statements)
+            return
+        
+        started = time.time()
+        for stmt in statements:
+            self._populate_statement(self.metamodel, stmt)
+            
+        if self.keep_statements:
+            self.statements.extend(statements)
+            
+        self.metamodel.invalidate_indices()
+        self._record_timing('populate', time.time() - started)
+        
+    def _record_timing(self, phase, seconds):
+        '''
+        Record the number of *seconds* spent in some loading *phase*.
+        '''
+        self.timings[phase] = self.timings.get(phase, 0.0) + seconds
+        
+    def _timed(self, phase, fn, *args):
+        '''
+        Invoke *fn* with some *args*, and record the time spent as a loading
+        *phase*.
+        '''
+        started = time.time()
+        try:
+            return fn(*args)
+        finally:
+            self._record_timing(phase, time.time() - started)
+        
     def filename_input(self, filename):
         '''
         Open and read from a *filename* on disk, and parse its content.
+        
+        If the loader was created with a cache directory, statements parsed
+        from the file are stored in the cache, and reused as long as the file
+        remains unchanged.
+        
+        **Note:** Cache entries are stored using pickle, and reading them may
+        execute arbitrary code. Anyone who is able to write to the cache
+        directory is hence able to run code in the process that loads the
+        model, so only use directories that are writable by trusted users.
+        Entries are written with permissions that only allow the current user
+        to read and write them.
+        
+        Files compressed using gzip, bzip2 or xz are decompressed while being
+        read, and parsed in chunks of complete statements, so that neither an
+        uncompressed copy on disk nor the uncompressed content as a whole in
+        memory is needed.
         '''
-        with open(filename, 'r') as f:
-            return self.file_input(f)
+        if self.cache_directory is not None:
+            return self._add_statements(_parse_file(filename,
+                                                    self.cache_directory,
+                                                    self))
+        
+        compressed, f = xtuml.tools.open_compressed(filename)
+        with f:
+            if not compressed:
+                return self.file_input(f, filename)
+            
+            for statements in self._parse_chunks(f, filename):
+                self._add_statements(statements)
     
-    def file_input(self, file_object):
+    def filenames_input(self, filenames, jobs=1):
+        '''
+        Open and read from several *filenames* on disk, and parse their content.
+        
+        Optionally, the files may be parsed by several *jobs*, i.e. processes,
+        in parallel. If the number of jobs is None, one job per cpu is used.
+        Statements are added in the order in which the files are given,
+        regardless of the number of jobs.
+        '''
+        filenames = list(filenames)
+        if jobs == 1 or len(filenames) < 2:
+            for filename in filenames:
+                ModelLoader.filename_input(self, filename)
+            return
+        
+        fn = partial(_parse_file_in_worker,
+                     cache_directory=self.cache_directory)
+        pool = multiprocessing.Pool(jobs, _init_worker)
+        try:
+            for statements in pool.imap(fn, filenames):
+                self._add_statements(statements)
+        finally:
+            pool.terminate()
+            pool.join()
+            
+    def mmap_input(self, filename):
+        '''
+        Memory-map a file with some *filename* on disk, and parse its content.
+        
+        The file is scanned incrementally rather than read into memory as a
+        whole, and only the parts of it that make up statements are decoded.
+        In streaming mode, statements are populated in batches which cover
+        approximately *chunk_size* bytes of the file each, which allow files
+        larger than the available memory to be loaded.
+        
+        Compressed files cannot be memory-mapped, and are read using
+        filename_input() instead.
+        '''
+        with open(filename, 'rb') as f:
+            if not os.fstat(f.fileno()).st_size:
+                return
+            
+            compressed = xtuml.tools.find_compression(f)
+            if not compressed:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                
+        if compressed:
+            return ModelLoader.filename_input(self, filename)
+
+        try:
+            size = self.chunk_size if self.metamodel is not None else None
+            started = time.time()
+            for statements in self._scan(data, filename, size=size):
+                self._record_timing('parse', time.time() - started)
+                self._add_statements(statements)
+                started = time.time()
+        finally:
+            data.close()
+            
+    def file_input(self, file_object, name=None):
         '''
         Read and parse data from a *file object*, i.e. the type of object 
-        returned by the builtin python function *open()*.
+        returned by the builtin python function *open()*. The *name* is used
+        when reporting positional information, and defaults to the name of
+        the file object.
+        
+        In streaming mode, the file is read and parsed in chunks of complete
+        statements.
         '''
-        return self.input(file_object.read(), name=file_object.name)
+        if name is None:
+            name = file_object.name
+            
+        if self.metamodel is None:
+            return self.input(file_object.read(), name=name)
+        
+        for statements in self._parse_chunks(file_object, name):
+            self._add_statements(statements)
+
+    def _parse_chunks(self, file_object, name):
+        '''
+        Read data from a *file object* in chunks of complete statements, each
+        of approximately *chunk_size* characters, and yield the statements
+        parsed from each chunk. The *name* is used when reporting positional
+        information.
+        '''
+        for lineno, data in _read_chunks(file_object, self.chunk_size):
+            yield self._parse(data, name, lineno)
 
     def populate_classes(self, metamodel):
         '''
@@ -255,21 +677,33 @@ class ModelLoader(object):
         input.
         '''
         for stmt in self.statements:
-            if not isinstance(stmt, CreateAssociationStmt):
-                continue
-            
-            ass = metamodel.define_association(stmt.rel_id,
-                                         stmt.source_kind,
-                                         stmt.source_keys,
-                                         'M' in stmt.source_cardinality,
-                                         'C' in stmt.source_cardinality,
-                                         stmt.source_phrase,
-                                         stmt.target_kind,
-                                         stmt.target_keys,
-                                         'M' in stmt.target_cardinality,
-                                         'C' in stmt.target_cardinality,
-                                         stmt.target_phrase)
-            ass.formalize()
+            if isinstance(stmt, CreateAssociationStmt):
+                self._populate_association(metamodel, stmt)
+
+    def _populate_association(self, metamodel, stmt):
+        '''
+        Populate a *metamodel* with an association previously encountered from
+        input. Values already assigned to instances of the source class are
+        kept as raw referential values, so that the instances may be connected
+        later on. Associations to kinds that are not selected are ignored.
+        '''
+        if not (self._is_selected(stmt.source_kind) and
+                self._is_selected(stmt.target_kind)):
+            return
+        
+        ass = metamodel.define_association(stmt.rel_id,
+                                     stmt.source_kind,
+                                     stmt.source_keys,
+                                     'M' in stmt.source_cardinality,
+                                     'C' in stmt.source_cardinality,
+                                     stmt.source_phrase,
+                                     stmt.target_kind,
+                                     stmt.target_keys,
+                                     'M' in stmt.target_cardinality,
+                                     'C' in stmt.target_cardinality,
+                                     stmt.target_phrase)
+        
+        ass.formalize()
 
     def populate_unique_identifiers(self, metamodel):
         '''
@@ -296,7 +730,18 @@ class ModelLoader(object):
         return metamodel.define_class(kind, attributes)
     
     @staticmethod
-    def _populate_instance_with_positional_arguments(metamodel, stmt):
+    def _assign_value(metaclass, inst, name, value):
+        '''
+        Assign a *value* to an attribute with some *name* on an *instance*
+        without any side effects. Values of referential attributes are kept
+        as raw values by the metaclass until the instance has been connected.
+        '''
+        if name in metaclass.referential_attributes:
+            metaclass.raw_values[name][inst] = value
+        else:
+            object.__setattr__(inst, name, value)
+
+    def _populate_instance_with_positional_arguments(self, metamodel, stmt):
         '''
         Populate a *metamodel* with an instance previously encountered from 
         input that was defined using positional arguments.
@@ -307,138 +752,344 @@ class ModelLoader(object):
                                                  names, stmt.values)
             
         metaclass = metamodel.find_metaclass(stmt.kind)
+        if self.specialize and not metaclass.storage:
+            metaclass.specialize()
+
         if len(metaclass.attributes) != len(stmt.values):
             logger.warn('%s:%d:schema mismatch' % (stmt.filename, stmt.lineno))
                 
-        inst = metamodel.new(stmt.kind)
+        projection = self._get_projection(metaclass)
+        inst = metaclass.allocate()
         for attr, value in zip(metaclass.attributes, stmt.values):
             name, ty = attr
+            if projection is not None and name.upper() not in projection:
+                ModelLoader._assign_value(metaclass, inst, name, None)
+                continue
+            
             py_value = deserialize_value(ty, value)
             if py_value is None:
+                # unknown types are reported as a MetaException
+                metaclass.default_value(ty)
                 raise ParsingException("%s:%d:unable to deserialize "\
                                        "%s to a %s" % (stmt.filename,
                                                        stmt.lineno,
                                                        value,
                                                        ty))
 
-            inst.__dict__[name] = py_value
+            ModelLoader._assign_value(metaclass, inst, name, py_value)
+        
+        # attributes without a value are assigned a default value
+        for name, ty in metaclass.attributes[len(stmt.values):]:
+            if name not in metaclass.referential_attributes:
+                value = metaclass.default_value(ty)
+                ModelLoader._assign_value(metaclass, inst, name, value)
         
         return inst
     
-    @staticmethod
-    def _populate_instance_with_named_arguments(metamodel, stmt):
+    def _compute_decoder(self, metaclass, names):
+        '''
+        Compute a plan for decoding values of instances of a *metaclass* that
+        are provided in a specific order, i.e. by attribute *names*. The plan
+        consists of a flag that indicate if some of the names are unknown to
+        the metaclass, and a list of (name, type, index, deserializer) tuples
+        for all attributes of the metaclass. Attributes that are not selected
+        are not decoded, i.e. their index is None.
+        '''
+        schema_unames = [name.upper() for name in metaclass.attribute_names]
+        inst_unames = [name.upper() for name in names]
+        mismatch = bool(set(inst_unames) - set(schema_unames))
+        projection = self._get_projection(metaclass)
+        
+        columns = list()
+        for name, ty in metaclass.attributes:
+            uname = name.upper()
+            if projection is not None and uname not in projection:
+                idx = None
+            elif uname in inst_unames:
+                idx = inst_unames.index(uname)
+            else:
+                idx = None
+                
+            fn = _deserializers.get(ty.upper())
+            columns.append((name, ty, idx, fn))
+            
+        return mismatch, columns
+    
+    def _populate_instance_with_named_arguments(self, metamodel, stmt):
         '''
         Populate a *metamodel* with an instance previously encountered from 
-        input that was defined using named arguments.
+        input that was defined using named arguments. Values are decoded using
+        a plan which is computed once for each class and order of attributes.
         '''
         if stmt.kind.upper() not in metamodel.metaclasses:
             ModelLoader._populate_matching_class(metamodel, stmt.kind, 
                                                  stmt.names, stmt.values)
             
         metaclass = metamodel.find_metaclass(stmt.kind)
+        if self.specialize and not metaclass.storage:
+            metaclass.specialize()
             
-        schema_unames = [name.upper() for name in metaclass.attribute_names]
-        inst_unames = [name.upper() for name in stmt.names]
-        
-        if set(inst_unames) - set(schema_unames):
+        key = (metaclass, tuple(stmt.names))
+        decoder = self.decoders.get(key)
+        if decoder is None:
+            decoder = self.decoders[key] = self._compute_decoder(metaclass,
+                                                                 stmt.names)
+        mismatch, columns = decoder
+        if mismatch:
             logger.warn('%s:%d:schema mismatch' % (stmt.filename, stmt.lineno))
             
-        inst = metamodel.new(stmt.kind)
-        for name, ty in metaclass.attributes:
-            uname = name.upper()
-            if uname in inst_unames:
-                idx = inst_unames.index(uname)
-                value = deserialize_value(ty, stmt.values[idx])
+        inst = metaclass.allocate()
+        values = stmt.values
+        raw_values = metaclass.raw_values
+        for name, ty, idx, fn in columns:
+            if idx is None:
+                value = None
+            else:
+                value = fn(values[idx]) if fn else None
                 if value is None:
+                    # unknown types are reported as a MetaException
+                    metaclass.default_value(ty)
                     raise ParsingException("%s:%d:unable to deserialize "\
                                            "%s to a %s" % (stmt.filename,
                                                            stmt.lineno,
                                                            value,
                                                            ty))
-            else:
-                value = None
             
-            inst.__dict__[name] = value
+            if name in raw_values:
+                raw_values[name][inst] = value
+            else:
+                object.__setattr__(inst, name, value)
 
         return inst
     
+    def _select(self, kinds, attributes):
+        '''
+        Restrict the instances to populate to some *kinds*, and to decode
+        some *attributes*, i.e. a dictionary that maps kinds to attribute
+        names. None means that no restriction applies.
+        '''
+        if kinds is not None:
+            kinds = set(kind.upper() for kind in kinds)
+            
+        if attributes is not None:
+            attributes = dict((kind.upper(), set(name.upper() for name in names))
+                              for kind, names in attributes.items())
+            
+        self.kinds = kinds
+        self.attributes = attributes
+        self.decoders.clear()
+        self.projections.clear()
+        
+    def _is_selected(self, kind):
+        '''
+        Determine if instances of some *kind* are to be populated.
+        '''
+        return self.kinds is None or kind.upper() in self.kinds
+    
+    def _is_deferred(self, kind):
+        '''
+        Determine if instances of some *kind* are to be populated once all
+        input has been parsed, i.e. in streaming mode when the attributes to
+        decode on instances of the kind are restricted.
+        '''
+        return (self.deferred is not None and self.attributes is not None and
+                kind.upper() in self.attributes)
+    
+    def _get_projection(self, metaclass):
+        '''
+        Obtain the set of upper-case names of attributes to decode on instances
+        of a *metaclass*, or None if all attributes are decoded. Attributes
+        which identify instances or refer to other instances are always
+        decoded so that instances can be connected.
+        '''
+        if self.attributes is None:
+            return None
+        
+        if metaclass not in self.projections:
+            names = self.attributes.get(metaclass.kind.upper())
+            if names is not None:
+                names = names | set(name.upper() for name in
+                                    metaclass.identifying_attributes |
+                                    metaclass.referential_attributes)
+                
+            self.projections[metaclass] = names
+            
+        return self.projections[metaclass]
+    
     def populate_instances(self, metamodel):
         '''
         Populate a *metamodel* with instances previously encountered from
         input.
         '''
+        self.decoders.clear()
+        self.projections.clear()
         for stmt in self.statements:
             if not isinstance(stmt, CreateInstanceStmt):
                 continue
-            
-            if stmt.names:
-                fn = self._populate_instance_with_named_arguments
+            elif self._is_deferred(stmt.kind):
+                self.deferred.append(stmt)
             else:
-                fn = self._populate_instance_with_positional_arguments
+                self._populate_instance(metamodel, stmt)
+
+        metamodel.invalidate_indices()
+    
+    def _populate_instance(self, metamodel, stmt):
+        '''
+        Populate a *metamodel* with an instance previously encountered from
+        input, unless instances of its kind are not selected.
+        '''
+        if not self._is_selected(stmt.kind):
+            return None
+        
+        if stmt.names:
+            fn = self._populate_instance_with_named_arguments
+        else:
+            fn = self._populate_instance_with_positional_arguments
             
-            fn(metamodel, stmt)
+        return fn(metamodel, stmt)
     
-    def populate_connections(self, metamodel):
+    def _populate_statement(self, metamodel, stmt):
         '''
-        Populate links in a *metamodel* with connections between them.
+        Populate a *metamodel* with a single statement encountered from input
+        while in streaming mode. Statements that refer to classes which are
+        yet to be defined are kept as pending.
+        '''
+        kinds = metamodel.metaclasses
+        if isinstance(stmt, CreateClassStmt):
+            metamodel.define_class(stmt.kind, stmt.attributes)
+            if stmt.kind.upper() in self.pending_kinds:
+                self._replay_pending(metamodel)
+            
+        elif (isinstance(stmt, CreateInstanceStmt) and
+              not self._is_selected(stmt.kind)):
+            pass
+        
+        elif isinstance(stmt, CreateInstanceStmt) and self._is_deferred(stmt.kind):
+            self.deferred.append(stmt)
+        
+        elif isinstance(stmt, CreateInstanceStmt) and stmt.kind.upper() in kinds:
+            self._populate_instance(metamodel, stmt)
+            
+        elif isinstance(stmt, CreateUniqueStmt) and stmt.kind.upper() in kinds:
+            metamodel.define_unique_identifier(stmt.kind, stmt.name, 
+                                               *stmt.attributes)
+            
+        elif (isinstance(stmt, CreateAssociationStmt) and
+              stmt.source_kind.upper() in kinds and
+              stmt.target_kind.upper() in kinds):
+            self._populate_association(metamodel, stmt)
+            
+        elif isinstance(stmt, CreateAssociationStmt):
+            self.pending.append(stmt)
+            self.pending_kinds.add(stmt.source_kind.upper())
+            self.pending_kinds.add(stmt.target_kind.upper())
+            
+        else:
+            self.pending.append(stmt)
+            self.pending_kinds.add(stmt.kind.upper())
+    
+    def _replay_pending(self, metamodel):
+        '''
+        Populate a *metamodel* with pending statements that no longer refer to
+        classes which are yet to be defined, in the order they were
+        encountered, so that instances of a class keep the order of the input.
+        '''
+        pending = self.pending
+        self.pending = list()
+        self.pending_kinds = set()
+        for stmt in pending:
+            self._populate_statement(metamodel, stmt)
+    
+    def populate_pending(self, metamodel):
+        '''
+        Populate a *metamodel* with statements that were kept as pending while
+        in streaming mode, followed by instances that were deferred until all
+        associations and unique identifiers are known.
         '''
-        storage = dict()
-        for ass in metamodel.associations:
-            source_class = ass.source_link.to_metaclass
-            target_class = ass.target_link.to_metaclass
-
-            if target_class not in storage:
-                storage[target_class] = dict()
-            
-            link_key = frozenset(ass.source_link.key_map.values())
-            if link_key not in storage[target_class]:
-                storage[target_class][link_key] = dict()
-                for other_inst in target_class.storage:
-                    inst_key = ass.source_link.compute_index_key(other_inst)
-                    if inst_key is None:
-                        continue
-                    
-                    if inst_key not in storage[target_class][link_key]:
-                        storage[target_class][link_key][inst_key] = xtuml.OrderedSet()
-
-                    storage[target_class][link_key][inst_key].add(other_inst)
-
-            for inst in source_class.storage:
-                inst_key = ass.source_link.compute_lookup_key(inst)
-                if inst_key is None:
-                    continue
+        pending = self.pending or list()
+        deferred = self.deferred or list()
+        self.pending = list()
+        self.pending_kinds = set()
+        self.deferred = list()
+        
+        for stmt in pending:
+            if isinstance(stmt, CreateUniqueStmt):
+                metamodel.define_unique_identifier(stmt.kind, stmt.name, 
+                                                   *stmt.attributes)
+        for stmt in pending:
+            if isinstance(stmt, CreateAssociationStmt):
+                self._populate_association(metamodel, stmt)
                 
-                if inst_key not in storage[target_class][link_key]:
-                    continue
+        for stmt in pending:
+            if isinstance(stmt, CreateInstanceStmt):
+                self._populate_instance(metamodel, stmt)
+        
+        self.decoders.clear()
+        self.projections.clear()
+        for stmt in deferred:
+            self._populate_instance(metamodel, stmt)
                 
-                for other_inst in storage[target_class][link_key][inst_key]:
-                    ass.source_link.connect(other_inst, inst, check=False)
-                    ass.target_link.connect(inst, other_inst, check=False)
-
-        for inst in metamodel.instances:
-            metaclass = xtuml.get_metaclass(inst)
-            for attr in metaclass.referential_attributes:
-                if attr in inst.__dict__:
-                    delattr(inst, attr)
+        metamodel.invalidate_indices()
+    
+    def populate_connections(self, metamodel):
+        '''
+        Populate links in a *metamodel* with connections between them.
+        
+        If the loader is lazy, instances are related across an association
+        the first time it is used rather than immediately.
+        '''
+        if self.lazy:
+            return metamodel.lazy_relate()
+        
+        timings = dict()
+        metamodel.batch_relate(timings)
+        for phase in ('index', 'clear', 'connect'):
+            self._record_timing('connections.' + phase, timings[phase])
 
     def populate(self, metamodel):
         '''
         Populate a *metamodel* with entities previously encountered from input.
         '''
-        self.populate_classes(metamodel)
-        self.populate_unique_identifiers(metamodel)
-        self.populate_associations(metamodel)
-        self.populate_instances(metamodel)
-        self.populate_connections(metamodel)
-
-    def build_metamodel(self, id_generator=None):
+        self._timed('classes', self.populate_classes, metamodel)
+        self._timed('unique_identifiers', self.populate_unique_identifiers,
+                    metamodel)
+        self._timed('associations', self.populate_associations, metamodel)
+        self._timed('instances', self.populate_instances, metamodel)
+        self._timed('connections', self.populate_connections, metamodel)
+
+    def build_metamodel(self, id_generator=None, kinds=None, attributes=None):
         '''
         Build and return a *xtuml.MetaModel* containing previously loaded input.
-        '''
-        m = xtuml.MetaModel(id_generator)
         
-        self.populate(m)
+        Optionally, only instances of some *kinds* are populated, and only
+        associations between those kinds are defined. Likewise, only some
+        *attributes*, given as a dictionary that maps kinds to attribute names,
+        may be decoded. Other attributes of those kinds are set to None, except
+        attributes that identify instances or refer to other instances.
         
+        In streaming mode, the metamodel that input has been populated into is
+        completed and returned instead, restricted to the kinds and attributes
+        given to stream().
+        
+        The number of seconds spent in each loading phase is accumulated in
+        the *timings* attribute of the loader, and logged at debug level.
+        '''
+        if self.metamodel is not None:
+            if id_generator is not None:
+                self.metamodel.id_generator = id_generator
+            
+            self._timed('pending', self.populate_pending, self.metamodel)
+            self._timed('connections', self.populate_connections,
+                        self.metamodel)
+            m = self.metamodel
+        else:
+            m = xtuml.MetaModel(id_generator)
+            self._select(kinds, attributes)
+            self.populate(m)
+        
+        for phase, seconds in self.timings.items():
+            logger.debug('%s: %.3fs' % (phase, seconds))
+            
         return m
 
     def t_comment(self, t):
@@ -693,10 +1344,220 @@ class ModelLoader(object):
             raise ParsingException("unknown error")
 
 
-def load_metamodel(resource):
+def _scan_line(line, quoted):
+    '''
+    Scan a *line* of sql and determine if its end is located within a string,
+    given whether or not the beginning of the line is *quoted*.
+    '''
+    pos = 0
+    while True:
+        if quoted:
+            pos = line.find("'", pos)
+            if pos < 0:
+                return True
+            
+            quoted = False
+        else:
+            quote = line.find("'", pos)
+            comment = line.find('--', pos)
+            if quote < 0 or 0 <= comment < quote:
+                return False
+            
+            quoted = True
+            pos = quote
+            
+        pos += 1
+
+
+def _read_chunks(file_object, size):
+    '''
+    Read sql from a *file object* in chunks of complete statements, each of
+    approximately some *size*, and yield the chunks together with the line
+    number they start at.
+    '''
+    lines = list()
+    length = 0
+    lineno = 1
+    quoted = False
+    for line in file_object:
+        lines.append(line)
+        length += len(line)
+        quoted = _scan_line(line, quoted)
+        if (length < size or quoted or '--' in line or
+            not line.rstrip().endswith(';')):
+            continue
+        
+        yield lineno, ''.join(lines)
+        lineno += len(lines)
+        lines = list()
+        length = 0
+    
+    if lines:
+        yield lineno, ''.join(lines)
+
+
+# Cached statements are only reused by the same version of pyxtuml and python.
+_cache_version = (xtuml.version.release, sys.version_info[0])
+
+
+def _hexdigest(data):
+    '''
+    Compute a hex-encoded sha1 digest of some *data*.
+    '''
+    if not isinstance(data, bytes):
+        data = data.encode('utf-8')
+        
+    return hashlib.sha1(data).hexdigest()
+
+
+def _file_digest(filename):
+    '''
+    Compute a hex-encoded sha1 digest of the content of a file with some
+    *filename* as stored on disk, i.e. possibly compressed.
+    '''
+    sha1 = hashlib.sha1()
+    with open(filename, 'rb') as f:
+        for block in iter(partial(f.read, 1 << 16), b''):
+            sha1.update(block)
+            
+    return sha1.hexdigest()
+
+
+def _read_cache(path):
+    '''
+    Read a cache entry from a file located at some *path*. None is returned if
+    the entry is missing, unreadable, or was stored by some other version.
+    '''
+    # unpickling creates lots of objects, but no reference cycles
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with open(path, 'rb') as f:
+            entry = pickle.load(f)
+    except Exception as e:
+        logger.debug('unable to read %s: %s' % (path, e))
+        return None
+    finally:
+        if enabled:
+            gc.enable()
+    
+    if entry[0] == _cache_version:
+        return entry
+
+
+def _write_cache(path, entry):
+    '''
+    Write a cache *entry* to a file located at some *path*. The file is
+    replaced atomically, so concurrent readers never see a partial entry, and
+    is only readable and writable by the current user.
+    '''
+    directory = os.path.dirname(path)
+    if not os.path.isdir(directory):
+        os.makedirs(directory, 0o700)
+        
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + '.',
+                               suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(entry, f, pickle.HIGHEST_PROTOCOL)
+    
+        if os.name == 'nt' and os.path.exists(path):
+            os.remove(path)
+        
+        os.rename(tmp, path)
+    except:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _parse_file(filename, cache_directory, loader):
+    '''
+    Open and parse a file with some *filename* using a *loader*, and return
+    the statements it contains.
+    
+    If a *cache directory* is provided, the statements are looked up in the
+    cache first, and stored in the cache after being parsed. Cache entries are
+    keyed by the path of the file, and are valid as long as the size and
+    modification time, or the content hash, of the file remains the same.
+    '''
+    if cache_directory is None:
+        return _read_statements(filename, loader)
+    
+    key = _hexdigest('%s:%s' % (_cache_version, os.path.abspath(filename)))
+    path = os.path.join(cache_directory, key)
+    stat = os.stat(filename)
+    entry = _read_cache(path)
+    if entry and entry[1:3] == (stat.st_size, stat.st_mtime):
+        statements = entry[4]
+    else:
+        digest = _file_digest(filename)
+        if entry and entry[3] == digest:
+            statements = entry[4]
+        else:
+            statements = _read_statements(filename, loader)
+            
+        entry = (_cache_version, stat.st_size, stat.st_mtime, digest,
+                 statements)
+        _write_cache(path, entry)
+        
+    for stmt in statements:
+        if stmt.filename != filename:
+            stmt.filename = filename
+
+    return statements
+
+
+def _read_statements(filename, loader):
+    '''
+    Open and parse a file with some *filename* using a *loader*, and return
+    the statements it contains. Compressed files are parsed in chunks of
+    complete statements, so that their uncompressed content is never kept in
+    memory as a whole.
+    '''
+    compressed, f = xtuml.tools.open_compressed(filename)
+    with f:
+        if not compressed:
+            return loader._parse(f.read(), filename)
+        
+        statements = list()
+        for chunk in loader._parse_chunks(f, filename):
+            statements.extend(chunk)
+            
+        return statements
+
+
+# The loader that a worker process parse files with, see _init_worker().
+_worker_loader = None
+
+
+def _init_worker():
+    '''
+    Initialize a worker process that parse files in parallel, i.e. create a
+    loader which is reused for every file that the worker parse.
+    '''
+    global _worker_loader
+    _worker_loader = ModelLoader()
+
+
+def _parse_file_in_worker(filename, cache_directory=None):
+    '''
+    Parse a file with some *filename* in a worker process, see _parse_file().
+    '''
+    return _parse_file(filename, cache_directory, _worker_loader)
+
+
+def load_metamodel(resource, jobs=1, cache_directory=None, lazy=False,
+                   kinds=None, attributes=None):
     '''
     Load and return a metamodel from a *resource*. The *resource* may be either
-    a filename, or a list of filenames.
+    a filename, or a list of filenames. Optionally, the files may be parsed by
+    several *jobs* in parallel, and parsed files may be kept in a *cache
+    directory* for subsequent loads, see ModelLoader.filename_input() for
+    security considerations. If the metamodel is *lazy*, instances are
+    related across an association the first time it is used. The instances
+    loaded may be restricted to some *kinds* and *attributes*, see
+    ModelLoader.build_metamodel().
     
     Usage example:
     
@@ -705,9 +1566,9 @@ def load_metamodel(resource):
     if isinstance(resource, str):
         resource = [resource]
         
-    loader = ModelLoader()
-    for filename in resource:
-        loader.filename_input(filename)
+    loader = ModelLoader(cache_directory, lazy)
+    loader.stream(kinds=kinds, attributes=attributes)
+    loader.filenames_input(resource, jobs)
     
     return loader.build_metamodel()
 
@@ -22,6 +22,12 @@ metaclasses, relate instances and perform navigations and queries.
 
 import logging
 import collections
+import heapq
+import itertools
+import operator
+import re
+import time
+import types
 
 import xtuml
 
@@ -97,40 +103,113 @@ class UnknownClassException(MetaModelException):
         MetaModelException.__init__(self, 'Unknown class %s' % kind)
 
 
-def _is_null(instance, name):
+def _get_raw_value(instance, name):
     '''
-    Determine if an attribute of an *instance* with a specific *name* 
-    is null.
+    Obtain the value of an attribute with a specific *name* on an *instance*.
+    Referential attributes that still hold a raw value, e.g. while a model is
+    being loaded, yield that value rather than navigating links.
     '''
-    if name in instance.__dict__:
-        value = instance.__dict__[name]
-    else:
-        value = getattr(instance, name)
+    values = get_metaclass(instance).raw_values.get(name)
+    if values and instance in values:
+        return values[instance]
+
+    return getattr(instance, name)
 
+
+def _is_null_value(metaclass, name, value):
+    '''
+    Determine if a *value* of an attribute with a specific *name* in a
+    *metaclass* is null.
+    '''
     if value:
         return False
     
     elif value is None:
         return True
 
-    name = name.upper()
-    metaclass = get_metaclass(instance)
-    for attr_name, attr_ty in metaclass.attributes:
-        if attr_name.upper() != name:
-            continue
+    entry = metaclass.attribute_table.get(name.upper())
+    if entry is not None:
+        _, _, is_null, _ = entry
+        return is_null(value)
 
-        attr_ty = attr_ty.upper()
-        if attr_ty == 'UNIQUE_ID':
-            # UUID(int=0) is reserved for null
-            return value == 0
 
-        elif attr_ty == 'STRING':
-            # empty string is reserved for null
-            return len(value) == 0
+def _is_null_unique_id(value):
+    # UUID(int=0) is reserved for null
+    return value == 0
 
-        else:
-            #null-values for integer, boolean and real are not supported
-            return False
+
+def _is_null_string(value):
+    # empty string is reserved for null
+    return len(value) == 0
+
+
+def _is_null_other(value):
+    #null-values for integer, boolean and real are not supported
+    return False
+
+
+def _key_extractor(metaclass, names):
+    '''
+    Create a function which computes a key from attributes with some *names*
+    on instances of a *metaclass*, i.e. a tuple of attribute values in the
+    order given by the names. None is computed for instances where any of the
+    values are null. Like _get_raw_value(), raw values of referential
+    attributes take precedence over values derived from links.
+    '''
+    columns = list()
+    for name in names:
+        entry = metaclass.attribute_table.get(name.upper())
+        is_null = entry[2] if entry is not None else None
+        columns.append((name, metaclass.raw_values.get(name), is_null))
+        
+    def extract(inst):
+        key = list()
+        for name, raw_values, is_null in columns:
+            if raw_values and inst in raw_values:
+                value = raw_values[inst]
+            else:
+                value = getattr(inst, name)
+                
+            if not value and (value is None or (is_null and is_null(value))):
+                return None
+            
+            key.append(value)
+            
+        return tuple(key)
+
+    return extract
+
+
+def _update_indices(instance, names):
+    '''
+    Update hash indices that depend on attributes with some *names* on an
+    *instance*. Changes are propagated to referential attributes of other
+    instances that refer to the changed attributes.
+    '''
+    stack = [(instance, names)]
+    visited = set()
+    while stack:
+        inst, names = stack.pop()
+        metaclass = get_metaclass(inst)
+        unames = set()
+        for name in names:
+            key = (inst, name.upper())
+            if key[1] in metaclass.indexed_attributes and key not in visited:
+                visited.add(key)
+                unames.add(key[1])
+
+        if not unames:
+            continue
+        
+        metaclass.update_indices(inst, unames)
+        for link in metaclass.referring_links:
+            ref_names = [ref_name for ref_name, name in link.key_map.items()
+                         if name.upper() in unames]
+            if not ref_names:
+                continue
+            
+            for other_inst in link.navigate(inst):
+                stack.append((other_inst, ref_names))
 
 
 def apply_query_operators(iterable, ops):
@@ -179,28 +258,43 @@ class Association(object):
         return self.source_link.kind == self.target_link.kind
 
     def batch_relate(self):
+        '''
+        Relate all instances across the association based on the values of
+        their referential and identifying attributes. Instances are matched
+        using a hash join over the target keys.
+        '''
         source_class = self.source_link.to_metaclass
         target_class = self.target_link.to_metaclass
-        key_map = tuple(zip(self.source_keys, self.target_keys))
-        
+        index = self.compute_target_index()
         for inst1 in source_class.storage:
-            kwargs = dict()
-            skip_instance = False
-            
-            for ref_key, primary_key in key_map:
-                if _is_null(inst1, ref_key):
-                    skip_instance = True
-                    break
-                
-                kwargs[primary_key] = getattr(inst1, ref_key)
-            
-            if skip_instance:
-                continue
-            
-            for inst2 in target_class.query(kwargs):
+            key = self.source_link.compute_lookup_key(inst1)
+            for inst2 in index.get(key, ()):
                 self.source_link.connect(inst2, inst1, check=False)
                 self.target_link.connect(inst1, inst2, check=False)
 
+        source_class.invalidate_indices()
+        if target_class is not source_class:
+            target_class.invalidate_indices()
+
+    def compute_target_index(self):
+        '''
+        Compute a hash table which maps index keys, as computed by 
+        Link.compute_index_key(), to instances on the target side of the
+        association.
+        '''
+        index = dict()
+        for inst in self.target_link.to_metaclass.storage:
+            key = self.source_link.compute_index_key(inst)
+            if key is None:
+                continue
+
+            if key not in index:
+                index[key] = list()
+                
+            index[key].append(inst)
+            
+        return index
+
     def formalize(self):
         '''
         Formalize the association and expose referential attributes
@@ -208,9 +302,29 @@ class Association(object):
         '''
         source_class = self.source_link.to_metaclass
         target_class = self.target_link.to_metaclass
-        
+
+        # Values already assigned to the attributes are kept as raw values,
+        # and removed from instances since the properties defined below
+        # shadow them.
+        for name in self.source_keys:
+            if name in source_class.referential_attributes:
+                continue
+            
+            raw_values = source_class.raw_values.setdefault(name, dict())
+            for inst in source_class.storage:
+                try:
+                    raw_values[inst] = object.__getattribute__(inst, name)
+                    object.__delattr__(inst, name)
+                except AttributeError:
+                    pass
+                
         source_class.referential_attributes |= set(self.source_keys)
         target_class.identifying_attributes |= set(self.target_keys)
+        if not any(link is self.source_link
+                   for link in target_class.referring_links):
+            target_class.referring_links.append(self.source_link)
+            target_class.indexed_attributes |= set(name.upper() for name in
+                                                   self.target_keys)
 
         def fget(inst, ref_name, alt_prop):
             other_inst = self.target_link.navigate_one(inst)
@@ -233,6 +347,9 @@ class Association(object):
         
         for ref_key, primary_key in zip(self.source_keys, self.target_keys):
             prop = getattr(source_class.clazz, ref_key, None)
+            if not isinstance(prop, property):
+                prop = None
+
             prop = property(partial(fget, ref_name=primary_key, alt_prop=prop), 
                             partial(fset, name=ref_key, ref_name=primary_key, alt_prop=prop))
             setattr(source_class.clazz, ref_key, prop)
@@ -350,15 +467,14 @@ class Link(dict):
         Compute the lookup key for an instance, i.e. a foreign key that
         can be used to identify an instance at the end of the link.
         '''
+        metaclass = get_metaclass(from_instance)
         kwargs = dict()
         for attr, other_attr in self.key_map.items():
-            if _is_null(from_instance, attr):
+            value = _get_raw_value(from_instance, attr)
+            if _is_null_value(metaclass, attr, value):
                 return None
             
-            if attr in from_instance.__dict__:
-                kwargs[other_attr] = from_instance.__dict__[attr]
-            else:
-                kwargs[other_attr] = getattr(from_instance, attr)
+            kwargs[other_attr] = value
 
         return frozenset(tuple(kwargs.items()))
 
@@ -367,18 +483,113 @@ class Link(dict):
         Compute the index key that can be used to identify an instance
         on the link.
         '''
+        metaclass = get_metaclass(to_instance)
         kwargs = dict()
         for attr in self.key_map.values():
-            if _is_null(to_instance, attr):
+            value = _get_raw_value(to_instance, attr)
+            if _is_null_value(metaclass, attr, value):
                 return None
             
-            if attr in to_instance.__dict__:
-                kwargs[attr] = to_instance.__dict__[attr]
-            else:
-                kwargs[attr] = getattr(to_instance, attr)
+            kwargs[attr] = value
 
         return frozenset(tuple(kwargs.items()))
 
+
+class _PendingLink(Link):
+    '''
+    A link which is yet to be populated with connections. The first time the
+    content of the link is accessed, e.g. when an instance is navigated,
+    related or checked across it, its association is related by invoking
+    *relate*, and the link turns into an ordinary link.
+    '''
+    relate = None
+    
+    def __contains__(self, key):
+        self.relate()
+        return key in self
+    
+    def __getitem__(self, key):
+        self.relate()
+        return self[key]
+    
+    def __iter__(self):
+        self.relate()
+        return iter(self)
+    
+    def __len__(self):
+        self.relate()
+        return len(self)
+    
+    def get(self, key, default=None):
+        self.relate()
+        return self.get(key, default)
+    
+    def keys(self):
+        self.relate()
+        return self.keys()
+    
+    def values(self):
+        self.relate()
+        return self.values()
+    
+    def items(self):
+        self.relate()
+        return self.items()
+
+
+def _relate_pending(ass, pending):
+    '''
+    Relate instances across an *association* with pending links, using raw
+    referential values kept by the source metaclass. Raw values that *pending*
+    associations no longer depend on are removed.
+    '''
+    source_link = ass.source_link
+    target_link = ass.target_link
+    for link in (source_link, target_link):
+        link.__class__ = Link
+        del link.relate
+    
+    source_class = source_link.to_metaclass
+    target_class = target_link.to_metaclass
+    key_map = sorted(source_link.key_map.items(), key=operator.itemgetter(1))
+    source_keys = [source_key for source_key, _ in key_map]
+    target_keys = [target_key for _, target_key in key_map]
+    
+    index = dict()
+    extract = _key_extractor(target_class, target_keys)
+    for inst in target_class.storage:
+        key = extract(inst)
+        if key is None:
+            continue
+        
+        if key in index:
+            index[key].append(inst)
+        else:
+            index[key] = [inst]
+
+    lookup_keys = list()
+    extract = _key_extractor(source_class, source_keys)
+    for inst in source_class.storage:
+        key = extract(inst)
+        if key is not None:
+            lookup_keys.append((inst, key))
+
+    source_link.clear()
+    target_link.clear()
+    for inst1, key in lookup_keys:
+        for inst2 in index.get(key, ()):
+            source_link.connect(inst2, inst1, check=False)
+            target_link.connect(inst1, inst2, check=False)
+            
+    for name in source_keys:
+        pending[(source_class, name)] -= 1
+        if pending[(source_class, name)]:
+            continue
+        
+        source_class.raw_values[name].clear()
+            
+    source_class.invalidate_indices()
+
     
 class QuerySet(xtuml.OrderedSet):
     '''
@@ -401,6 +612,286 @@ class QuerySet(xtuml.OrderedSet):
             return next(reversed(self))
 
 
+class Query(QuerySet):
+    '''
+    A lazily evaluated set of instances that match a query. Where-clauses,
+    filter functions, ordering and a limit are collected by the query, which
+    is not evaluated until its content is accessed, e.g. when it is iterated.
+    Where-clauses are answered using hash indices when possible, and the
+    first, last or top-N instances of an ordered query are obtained without
+    sorting all instances.
+    
+    Since the query is evaluated when first used rather than when created,
+    instances created or modified in between are taken into account. Queries
+    are only obtained on request, e.g. from MetaModel.select_lazily() or
+    NavChain.lazy().
+    
+    Usage example:
+    
+    >>> m = xtuml.load_metamodel('db.sql')
+    >>> q = m.select_lazily('My_Class').where(Name='Test').order_by('Number')
+    >>> inst = q.limit(5).last
+    '''
+    evaluated = False
+    
+    def __init__(self, source, ops=(), limit=None):
+        '''
+        Create a query that selects instances from a *source*, i.e. a function
+        which is passed the query operators and return a sequence of candidate
+        instances. Optionally, a sequence of query operators such as where_eq(),
+        order_by() or filter functions, and a *limit* may be provided.
+        '''
+        self._source = source
+        self._ops = tuple(ops)
+        self._limit = limit
+        self.evaluated = False
+        
+    @classmethod
+    def _from_iterable(cls, iterable):
+        # results of set operations, e.g. union, are plain query sets
+        return QuerySet(iterable)
+    
+    def _materialize(self):
+        '''
+        Evaluate the query and populate the underlying ordered set, unless
+        the query already has been evaluated.
+        '''
+        if not self.evaluated:
+            xtuml.OrderedSet.__init__(self, self._evaluate())
+            self.evaluated = True
+            
+    def add(self, key):
+        self._materialize()
+        QuerySet.add(self, key)
+        
+    def discard(self, key):
+        self._materialize()
+        QuerySet.discard(self, key)
+        
+    def __len__(self):
+        self._materialize()
+        return QuerySet.__len__(self)
+    
+    def __contains__(self, key):
+        self._materialize()
+        return QuerySet.__contains__(self, key)
+    
+    def __iter__(self):
+        self._materialize()
+        return QuerySet.__iter__(self)
+    
+    def __reversed__(self):
+        self._materialize()
+        return QuerySet.__reversed__(self)
+    
+    @property
+    def first(self):
+        '''
+        Obtain the first instance that match the query.
+        '''
+        if self.evaluated:
+            return QuerySet.first.fget(self)
+        
+        return next(iter(self._evaluate(1)), None)
+
+    @property
+    def last(self):
+        '''
+        Obtain the last instance that match the query.
+        '''
+        if self.evaluated:
+            return QuerySet.last.fget(self)
+        
+        filters, orderings = self._plan()
+        if self._limit is not None or len(orderings) > 1:
+            return next(reversed(list(self._evaluate())), None)
+        
+        last = None
+        iterable = apply_query_operators(self._source(self._ops), filters)
+        if not orderings:
+            for last in iterable:
+                pass
+            
+            return last
+        
+        order = orderings[0]
+        last_key = None
+        for inst in iterable:
+            key = order.key(inst)
+            if last is None or (key <= last_key if order.reverse
+                                else key >= last_key):
+                last = inst
+                last_key = key
+
+        return last
+    
+    def _plan(self):
+        '''
+        Split the query operators into filters, i.e. where-clauses and filter
+        functions, and ordering operators. Since ordering is stable, filters
+        may be applied before any ordering takes place.
+        '''
+        filters = list()
+        orderings = list()
+        for op in self._ops:
+            if isinstance(op, OrderBy):
+                orderings.append(op)
+            else:
+                filters.append(op)
+
+        return filters, orderings
+    
+    def _evaluate(self, limit=None):
+        '''
+        Evaluate the query, and return a sequence of matching instances.
+        Optionally, a *limit* on the number of instances may be provided.
+        '''
+        if limit is None or (self._limit is not None and self._limit < limit):
+            limit = self._limit
+        
+        filters, orderings = self._plan()
+        iterable = apply_query_operators(self._source(self._ops), filters)
+        if limit is not None and len(orderings) == 1:
+            order, = orderings
+            return order(iterable, limit)
+        
+        iterable = apply_query_operators(iterable, orderings)
+        if limit is not None:
+            iterable = itertools.islice(iterable, limit)
+            
+        return iterable
+    
+    def _extend(self, op):
+        return Query(self._source, self._ops + (op,), self._limit)
+    
+    def where(self, **kwargs):
+        '''
+        Restrict the query to instances with attributes that match some named
+        keywords, see where_eq().
+        '''
+        return self._extend(where_eq(**kwargs))
+
+    def filter(self, fn):
+        '''
+        Restrict the query to instances for which a filter function *fn*
+        returns True.
+        '''
+        return self._extend(fn)
+
+    def order_by(self, *attrs):
+        '''
+        Order the instances that match the query, see order_by().
+        '''
+        return self._extend(order_by(*attrs))
+        
+    def reverse_order_by(self, *attrs):
+        '''
+        Order the instances that match the query in reverse, see
+        reverse_order_by().
+        '''
+        return self._extend(reverse_order_by(*attrs))
+
+    def limit(self, limit):
+        '''
+        Limit the number of instances that match the query to at most *limit*
+        instances. The limit is applied after all other query operators.
+        '''
+        if self._limit is not None:
+            limit = min(limit, self._limit)
+            
+        return Query(self._source, self._ops, limit)
+
+
+def _unique(iterable):
+    '''
+    Yield each element in an *iterable* once, in order of first occurrence.
+    '''
+    seen = set()
+    for element in iterable:
+        if element not in seen:
+            seen.add(element)
+            yield element
+
+
+class Index(dict):
+    '''
+    A hash index maps a tuple of values, one for each of its *attributes*, to
+    the instances that hold those values.
+
+    An index is populated lazily the first time it is used, and is kept up to
+    date by its metaclass from then on.
+    '''
+    attributes = None
+    instance_keys = None
+    populated = False
+
+    def __init__(self, attributes):
+        self.attributes = tuple(attributes)
+        self.instance_keys = dict()
+        self.populated = False
+
+    def compute_key(self, instance):
+        '''
+        Compute the key under which an *instance* is indexed.
+        '''
+        return tuple(getattr(instance, name) for name in self.attributes)
+
+    def add(self, instance):
+        '''
+        Add an *instance* to the index.
+        '''
+        key = self.compute_key(instance)
+        if key not in self:
+            self[key] = xtuml.OrderedSet()
+
+        self[key].add(instance)
+        self.instance_keys[instance] = key
+
+    def discard(self, instance):
+        '''
+        Remove an *instance* from the index, if present.
+        '''
+        if instance not in self.instance_keys:
+            return
+
+        key = self.instance_keys.pop(instance)
+        instances = self[key]
+        instances.discard(instance)
+        if not instances:
+            del self[key]
+
+    def reindex(self, instance):
+        '''
+        Move an *instance* already present in the index to the key that
+        corresponds to its current attribute values.
+        '''
+        if instance not in self.instance_keys:
+            return
+
+        key = self.compute_key(instance)
+        if self.instance_keys[instance] != key:
+            self.discard(instance)
+            self.add(instance)
+
+    def populate(self, instances):
+        '''
+        Populate the index with a sequence of *instances*.
+        '''
+        self.invalidate()
+        for inst in instances:
+            self.add(inst)
+
+        self.populated = True
+
+    def invalidate(self):
+        '''
+        Remove all instances from the index, and mark it as unpopulated.
+        '''
+        self.clear()
+        self.instance_keys.clear()
+        self.populated = False
+
+
 class Class(object):
     '''
     A class that all instances created by a metaclass inherits from. 
@@ -408,6 +899,8 @@ class Class(object):
     **Note**: Accesses to attributes, e.g. getattr/setattr, on these objects
     are case insensitive.
     '''
+    __slots__ = ()
+    
     def __add__(self, other):
         assert isinstance(other, Class)
         return QuerySet([self, other])
@@ -418,38 +911,37 @@ class Class(object):
         else: return QuerySet([self])
 
     def __getattr__(self, name):
-        uname = name.upper()
-        for attr, _ in get_metaclass(self).attributes:
-            if attr.upper() != uname :
-                continue
-            
-            if attr in self.__dict__:
-                return self.__dict__[attr]
-            else:
-                return object.__getattribute__(self, attr)
-        
-        return object.__getattribute__(self, name)
+        # only invoked when the name is not found by an ordinary lookup, e.g.
+        # when an attribute is accessed using a different case.
+        attr = get_metaclass(self).attribute_aliases.get(name.upper())
+        if attr is None or attr == name:
+            return object.__getattribute__(self, name)
+
+        return getattr(self, attr)
     
     def __setattr__(self, name, value):
+        metaclass = get_metaclass(self)
         uname = name.upper()
-        for attr, _ in get_metaclass(self).attributes:
-            if attr.upper() != uname :
-                continue
+        attr = metaclass.attribute_aliases.get(uname)
+        if attr is None:
+            object.__setattr__(self, name, value)
+            attr = name
+        else:
+            object.__setattr__(self, attr, value)
 
-            if attr in self.__dict__:
-                self.__dict__[attr] = value
-            else:
-                return object.__setattr__(self, attr, value)
-        
-        self.__dict__[name] = value
+        if uname in metaclass.indexed_attributes:
+            _update_indices(self, [attr])
         
     def __delattr__(self, name):
         uname = name.upper()
-        for name in self.__dict__:
-            if uname == name.upper():
-                break
+        values = getattr(self, '__dict__', ())
+        for key in values:
+            if uname == key.upper():
+                del values[key]
+                return
 
-        del self.__dict__[name]
+        attr = get_metaclass(self).attribute_aliases.get(uname, name)
+        object.__delattr__(self, attr)
     
     def __str__(self):
         values = list()
@@ -476,9 +968,15 @@ class MetaClass(object):
     kind = None
     attributes = None
     referential_attributes = None
+    raw_values = None
     identifying_attributes = None
+    attribute_aliases = None
+    attribute_table = None
+    indexed_attributes = None
     links = None
+    referring_links = None
     indices = None
+    hash_indices = None
     clazz = None
     storage = None
     
@@ -486,11 +984,17 @@ class MetaClass(object):
         self.metamodel = metamodel
         self.kind = kind
         self.attributes = list()
+        self.attribute_aliases = dict()
+        self.attribute_table = dict()
+        self.indexed_attributes = set()
         self.referential_attributes = set()
+        self.raw_values = dict()
         self.identifying_attributes = set()
         self.indices = dict()
+        self.hash_indices = dict()
         self.links = dict()
-        self.storage = list()
+        self.referring_links = list()
+        self.storage = xtuml.OrderedSet()
         self.clazz = type(kind, (Class,), dict(__metaclass__=self))
         
     def __call__(self, *args, **kwargs):
@@ -498,6 +1002,87 @@ class MetaClass(object):
         Create and return a new instance using the metaclass constructor.
         '''
         return self.new(*args, **kwargs)
+
+    def specialize(self):
+        '''
+        Replace the class that instances are created from with a class that
+        store attribute values in __slots__ rather than in a dictionary on each
+        instance, which reduce the memory footprint of instances.
+        
+        Instances of a specialized class have no instance dictionary, so only
+        attributes defined by the metaclass may be assigned, and attributes
+        cannot be added to the metaclass once it has instances. Weak
+        references to instances are still supported. Metaclasses with
+        attribute names that are not valid identifiers are left as is, and
+        specialization is only possible as long as the metaclass has no
+        instances.
+        
+        Specialization is opt-in, e.g. via the *specialize* flag of
+        *xtuml.ModelLoader*.
+        '''
+        if self.specialized:
+            return
+        
+        if self.storage:
+            raise MetaException('Unable to specialize %s, instances already '
+                                'exist' % self.kind)
+        
+        for name, _ in self.attributes:
+            if not re.match(r'^[A-Za-z_][A-Za-z0-9_]*$', name):
+                return
+            
+        self.clazz = self._derive_slotted_class()
+        
+    @property
+    def specialized(self):
+        '''
+        Determine if instances of the metaclass store attribute values in
+        __slots__, see specialize().
+        '''
+        return '__slots__' in self.clazz.__dict__
+    
+    def _derive_slotted_class(self):
+        '''
+        Derive a class with a slot for each attribute, and one for weak
+        references, carrying over members defined on the current class, e.g.
+        properties that expose referential attributes.
+        '''
+        namespace = dict()
+        for key, value in self.clazz.__dict__.items():
+            if key in ('__dict__', '__weakref__', '__slots__'):
+                continue
+            
+            if isinstance(value, types.MemberDescriptorType):
+                continue
+            
+            namespace[key] = value
+            
+        slots = list()
+        for name, _ in self.attributes:
+            if name in namespace or hasattr(Class, name) or name in slots:
+                continue
+            
+            slots.append(name)
+            
+        namespace['__slots__'] = tuple(slots) + ('__weakref__',)
+        return type(self.kind, (Class,), namespace)
+    
+    def _check_attribute_storage(self, name):
+        '''
+        Make sure that instances of a specialized metaclass are able to store
+        values of a new attribute with some *name*.
+        '''
+        if not self.specialized:
+            return
+        
+        if self.storage:
+            raise MetaException('Unable to add %s to %s, instances of a '
+                                'specialized class already exist' %
+                                (name, self.kind))
+        
+        if not re.match(r'^[A-Za-z_][A-Za-z0-9_]*$', name):
+            raise MetaException('Unable to add %s to %s, the attribute name '
+                                'is not a valid identifier' % (name, self.kind))
         
     @property
     def attribute_names(self):
@@ -506,14 +1091,51 @@ class MetaClass(object):
         '''
         return [name for name, _ in self.attributes]
 
+    def _update_attribute_table(self):
+        '''
+        Update the case insensitive mapping from upper-case attribute names to
+        attribute names as they are defined in the metaclass, and the table
+        of precomputed attribute properties.
+        '''
+        self.attribute_aliases.clear()
+        self.attribute_table.clear()
+        for name, ty in reversed(self.attributes):
+            self.attribute_aliases[name.upper()] = name
+            self.attribute_table[name.upper()] = self._make_table_entry(name, ty)
+            
+    def _add_table_entry(self, name, type_name):
+        '''
+        Add an attribute with a given *name* and *type name* to the table of
+        precomputed attribute properties, unless the name is already taken.
+        '''
+        uname = name.upper()
+        if uname not in self.attribute_table:
+            self.attribute_aliases[uname] = name
+            self.attribute_table[uname] = self._make_table_entry(name, type_name)
+
+    def _make_table_entry(self, name, type_name):
+        '''
+        Compute a table entry for an attribute with a given *name* and *type
+        name*, i.e. a tuple with the name of the attribute, its type name, a
+        null predicate and a default value factory.
+        '''
+        uname = type_name.upper()
+        if uname == 'UNIQUE_ID':
+            is_null = _is_null_unique_id
+        elif uname == 'STRING':
+            is_null = _is_null_string
+        else:
+            is_null = _is_null_other
+            
+        return (name, type_name, is_null, self._default_factory(type_name))
+
     def attribute_type(self, attribute_name):
         '''
         Obtain the type of an attribute.
         '''
-        attribute_name = attribute_name.upper()
-        for name, ty in self.attributes:
-            if name.upper() == attribute_name:
-                return ty
+        entry = self.attribute_table.get(attribute_name.upper())
+        if entry is not None:
+            return entry[1]
     
     def add_link(self, metaclass, rel_id, phrase, conditional, many):
         '''
@@ -524,22 +1146,89 @@ class MetaClass(object):
         self.links[key] = link
 
         return link
+
+    def add_index(self, named_attributes):
+        '''
+        Add a hash index on some *named attributes* that speeds up queries for
+        instances with particular values on those attributes, and return it.
+        '''
+        key = frozenset(name.upper() for name in named_attributes)
+        if key not in self.hash_indices:
+            self.hash_indices[key] = Index(named_attributes)
+            self.indexed_attributes |= key
+
+        return self.hash_indices[key]
+
+    def find_index(self, names):
+        '''
+        Find the hash index that covers the largest subset of some attribute
+        *names*, or None if no such index exist.
+        '''
+        unames = frozenset(name.upper() for name in names)
+        candidate = None
+        for key, index in self.hash_indices.items():
+            if not key <= unames:
+                continue
+
+            if candidate is None or len(key) > len(candidate.attributes):
+                candidate = index
+
+        return candidate
+
+    def update_indices(self, instance, unames):
+        '''
+        Update populated hash indices that cover any of the upper-case
+        attribute names in *unames* with the current values of an *instance*.
+        '''
+        for key, index in self.hash_indices.items():
+            if index.populated and not key.isdisjoint(unames):
+                index.reindex(instance)
+
+    def invalidate_indices(self):
+        '''
+        Invalidate all hash indices. The indices are populated again the next
+        time they are used.
+        '''
+        for index in self.hash_indices.values():
+            index.invalidate()
             
+    def set_raw_value(self, instance, name, value):
+        '''
+        Assign a raw *value* to a referential attribute with some *name* on an
+        *instance*. The raw value takes precedence over the value derived from
+        links until the instance is related again, e.g. by
+        *MetaModel.batch_relate()*.
+        '''
+        name = self.attribute_aliases.get(name.upper(), name)
+        if name not in self.referential_attributes:
+            raise MetaException('%s.%s is not a referential attribute' %
+                                (self.kind, name))
+            
+        self.raw_values[name][instance] = value
+        
     def append_attribute(self, name, type_name):
         '''
         Append an attribute with a given *name* and *type name* at the end of
         the list of attributes.
         '''
+        self._check_attribute_storage(name)
         attr = (name, type_name)
         self.attributes.append(attr)
+        self._add_table_entry(name, type_name)
+        if self.specialized:
+            self.clazz = self._derive_slotted_class()
         
     def insert_attribute(self, index, name, type_name):
         '''
         Insert an attribute with a given *name* and *type name* at some *index*
         in the list of attributes.
         '''
+        self._check_attribute_storage(name)
         attr = (name, type_name)
         self.attributes.insert(index, attr)
+        self._update_attribute_table()
+        if self.specialized:
+            self.clazz = self._derive_slotted_class()
         
     def delete_attribute(self, name):
         '''
@@ -549,46 +1238,63 @@ class MetaClass(object):
             attr_name, _ = attr
             if attr_name == name:
                 del self.attributes[idx]
+                self._update_attribute_table()
                 return
         
     def default_value(self, type_name):
         '''
         Obtain the default value for some *type name*.
         '''
+        return self._default_factory(type_name)()
+
+    def _default_factory(self, type_name):
+        '''
+        Obtain a function that compute the default value for some *type name*.
+        '''
         uname = type_name.upper()
         if   uname == 'BOOLEAN':
-            return False
+            return bool
             
         elif uname == 'INTEGER':
-            return 0
+            return int
             
         elif uname == 'REAL':
-            return 0.0
+            return float
             
         elif uname == 'STRING':
-            return ''
+            return str
             
         elif uname == 'UNIQUE_ID':
-            if self.metamodel:
-                return next(self.metamodel.id_generator)
-            else:
-                return None
-        else:
+            return self._next_id
+        
+        def unknown_type():
             raise MetaException("Unknown type named '%s'" % type_name)
         
+        return unknown_type
+
+    def _next_id(self):
+        '''
+        Obtain the next unique identifier from the id generator of the
+        metamodel, or None if the metaclass is not part of a metamodel.
+        '''
+        if self.metamodel:
+            return next(self.metamodel.id_generator)
+        else:
+            return None
+        
     def new(self, *args, **kwargs):
         '''
         Create and return a new instance.
         '''
         inst = self.clazz()
-        self.storage.append(inst)
+        self.storage.add(inst)
         
         # set all attributes with an initial default value
         referential_attributes = dict()
-        for name, ty in self.attributes:
+        for name, _ in self.attributes:
             if name not in self.referential_attributes:
-                value = self.default_value(ty)
-                setattr(inst, name, value)
+                _, _, _, default = self.attribute_table[name.upper()]
+                setattr(inst, name, default())
             
         # set all positional arguments
         for attr, value in zip(self.attributes, args):
@@ -606,6 +1312,10 @@ class MetaClass(object):
                 referential_attributes[name] = value
         
         if not referential_attributes:
+            for index in self.hash_indices.values():
+                if index.populated:
+                    index.add(inst)
+
             return inst
         
         # batch relate referential attributes 
@@ -626,8 +1336,137 @@ class MetaClass(object):
         for name, value in referential_attributes.items():
             if getattr(inst, name) != value:
                 logger.warning('unable to assign %s to %s', name, inst)
+
+        for index in self.hash_indices.values():
+            if index.populated:
+                index.add(inst)
+
+        return inst
+
+    def allocate(self):
+        '''
+        Create and return a new instance without assigning any values to its
+        attributes, e.g. when all attribute values are about to be assigned by
+        a loader. Since the instance lack attribute values, populated hash
+        indices of the metaclass are invalidated.
+        '''
+        inst = self.clazz()
+        self.storage.add(inst)
+        
+        for index in self.hash_indices.values():
+            if index.populated:
+                index.invalidate()
                 
         return inst
+    
+    def bulk_new(self, rows=None, columns=None):
+        '''
+        Create and return a list of new instances, one for each of some *rows*
+        of positional attribute values, or from *columns* of values, i.e. a
+        dictionary that maps attribute names to equally long sequences of
+        values.
+        
+        Supplied values are assigned directly, and default values are only
+        computed for attributes without a supplied value. Instances are related
+        via referential attributes in a single pass once all instances have
+        been created.
+        '''
+        if columns is not None:
+            names = list(columns.keys())
+            if len(set(len(columns[name]) for name in names)) > 1:
+                raise MetaException('Columns must be of equal length')
+            
+            rows = zip(*[columns[name] for name in names])
+        else:
+            names = self.attribute_names
+            rows = rows or list()
+            
+        plans = dict()
+        referential_attributes = set()
+        instances = list()
+        for row in rows:
+            plan = plans.get(len(row))
+            if plan is None:
+                plan = self._bulk_plan(names[:len(row)])
+                plans[len(row)] = plan
+                referential_attributes |= set(name for name, raw_values
+                                              in plan[0]
+                                              if raw_values is not None)
+                
+            assignments, defaults = plan
+            inst = self.allocate()
+            for name, default in defaults:
+                object.__setattr__(inst, name, default())
+                
+            for (name, raw_values), value in zip(assignments, row):
+                if raw_values is not None:
+                    raw_values[inst] = value
+                else:
+                    object.__setattr__(inst, name, value)
+                    
+            instances.append(inst)
+            
+        if referential_attributes and self.metamodel:
+            self._bulk_relate(instances, referential_attributes)
+        
+        return instances
+        
+    def _bulk_plan(self, names):
+        '''
+        Compute a plan for assigning values to attributes with some *names*,
+        i.e. a list of (name, raw values) tuples where *raw values* is the
+        table that hold raw values of a referential attribute, or None, and a
+        list of (name, default factory) tuples for attributes without a
+        supplied value.
+        '''
+        assignments = list()
+        for name in names:
+            name = self.attribute_aliases.get(name.upper(), name)
+            assignments.append((name, self.raw_values.get(name)))
+            
+        supplied = set(name for name, _ in assignments)
+        defaults = list()
+        for name, _ in self.attributes:
+            if name in supplied or name in self.referential_attributes:
+                continue
+            
+            _, _, _, default = self.attribute_table[name.upper()]
+            defaults.append((name, default))
+            
+        return assignments, defaults
+    
+    def _bulk_relate(self, instances, referential_attributes):
+        '''
+        Relate new *instances* to other instances across associations that are
+        formalized by some *referential attributes*, using the raw values of
+        those attributes. The raw values are removed afterwards.
+        '''
+        for ass in self.metamodel.associations:
+            if ass.source_link.to_metaclass is not self:
+                continue
+            
+            if not set(ass.source_keys) <= referential_attributes:
+                continue
+            
+            index = ass.compute_target_index()
+            for inst in instances:
+                key = ass.source_link.compute_lookup_key(inst)
+                if key is None:
+                    continue
+                
+                if key not in index:
+                    logger.warning('unable to assign %s to %s',
+                                   ', '.join(ass.source_keys), inst)
+                    continue
+                
+                for other_inst in index[key]:
+                    ass.source_link.connect(other_inst, inst, check=False)
+                    ass.target_link.connect(inst, other_inst, check=False)
+                    
+        for name in referential_attributes:
+            raw_values = self.raw_values[name]
+            for inst in instances:
+                raw_values.pop(inst, None)
 
     def clone(self, instance):
         '''
@@ -650,10 +1489,16 @@ class MetaClass(object):
         part of the metaclass, a *MetaException* is thrown.
         '''
         if instance in self.storage:
-            self.storage.remove(instance)
+            self.storage.discard(instance)
         else:
             raise DeleteException("Instance not found in the instance pool")
 
+        for index in self.hash_indices.values():
+            index.discard(instance)
+
+        for raw_values in self.raw_values.values():
+            raw_values.pop(instance, None)
+            
         if not disconnect:
             return
         
@@ -670,8 +1515,7 @@ class MetaClass(object):
         where_eq(), order_by() or filter functions may be passed as optional
         arguments.
         '''
-        s = apply_query_operators(self.storage, args)
-        return next(iter(s), None)
+        return Query(self._select_candidates, args).first
 
     def select_many(self, *args):
         '''
@@ -679,11 +1523,50 @@ class MetaClass(object):
         where_eq(), order_by() or filter functions may be passed as optional
         arguments.
         '''
-        s = apply_query_operators(self.storage, args)
-        if isinstance(s, QuerySet):
-            return s
-        else:
-            return QuerySet(s)
+        return QuerySet(Query(self._select_candidates, args)._evaluate())
+
+    def select_lazily(self, *args):
+        '''
+        Like select_many(), but return a lazily evaluated query which may be
+        refined further, and is not evaluated until its content is accessed.
+        '''
+        return Query(self._select_candidates, args)
+
+    def _lookup(self, dictonary_of_values):
+        '''
+        Use a hash index to look up a list of candidate instances that may
+        match a *dictonary of values*, or return None if no index is available.
+        '''
+        index = self.find_index(dictonary_of_values.keys())
+        if index is None:
+            return None
+
+        if not index.populated:
+            index.populate(self.storage)
+
+        values = dict((name.upper(), value)
+                      for name, value in dictonary_of_values.items())
+        key = tuple(values[name.upper()] for name in index.attributes)
+        try:
+            return list(index.get(key, ()))
+        except TypeError:
+            # unhashable values are not present in the index
+            return None
+
+    def _select_candidates(self, ops):
+        '''
+        Obtain a sequence of instances that may satisfy a series of query
+        operators, using a hash index when a where-clause allows it.
+        '''
+        for op in ops:
+            if not isinstance(op, dict):
+                continue
+
+            candidates = self._lookup(op)
+            if candidates is not None:
+                return candidates
+
+        return self.storage
 
     def _find_assoc_links(self, kind, rel_id, phrase=''):
         key = (kind.upper(), rel_id, phrase)
@@ -697,6 +1580,37 @@ class MetaClass(object):
         
         raise UnknownLinkException(self.kind, kind, rel_id, phrase)
     
+    def _find_links(self, kind, rel_id, phrase=''):
+        key = (kind.upper(), rel_id, phrase)
+        if key in self.links:
+            return (self.links[key],)
+        
+        return self._find_assoc_links(kind, rel_id, phrase)
+
+    def compile_path(self, path):
+        '''
+        Compile a navigation *path*, i.e. a sequence of (kind, rel_id, phrase)
+        tuples, that starts at the metaclass into a tuple of hops. Each hop is
+        a tuple of links, either a single link or two links that traverse an
+        associative class. Compiled paths are cached in the metamodel.
+        '''
+        key = (self.kind, path)
+        if self.metamodel and key in self.metamodel.paths:
+            return self.metamodel.paths[key]
+        
+        hops = list()
+        metaclass = self
+        for kind, rel_id, phrase in path:
+            links = metaclass._find_links(kind, rel_id, phrase)
+            metaclass = links[-1].to_metaclass
+            hops.append(links)
+
+        hops = tuple(hops)
+        if self.metamodel:
+            self.metamodel.paths[key] = hops
+            
+        return hops
+    
     def navigate(self, inst, kind, rel_id, phrase=''):
         '''
         Navigate across a link with some *rel_id* and *phrase* that yields
@@ -719,9 +1633,128 @@ class MetaClass(object):
         Query the instance pool for instances with attributes that match a given
         *dictonary of values*.
         '''
-        return WhereEqual(dictonary_of_values)(self.storage)
+        candidates = self._lookup(dictonary_of_values)
+        if candidates is None:
+            candidates = self.storage
+
+        return WhereEqual(dictonary_of_values)(candidates)
     
 
+def _navigate_hops(instances, hops):
+    '''
+    Navigate from a list of *instances* of the same kind along a sequence of
+    *hops* as computed by MetaClass.compile_path(). Duplicates are removed
+    from the set of instances reached after each hop.
+    '''
+    for links in hops:
+        result = list()
+        visited = set()
+        if len(links) == 1:
+            link, = links
+            for inst in instances:
+                for other_inst in link.get(inst, ()):
+                    if other_inst not in visited:
+                        visited.add(other_inst)
+                        result.append(other_inst)
+        else:
+            link1, link2 = links
+            for inst in instances:
+                for assoc_inst in link1.get(inst, ()):
+                    for other_inst in link2.get(assoc_inst, ()):
+                        if other_inst not in visited:
+                            visited.add(other_inst)
+                            result.append(other_inst)
+                
+        instances = result
+        
+    return instances
+
+
+def _navigate_hops_lazily(instances, hops):
+    '''
+    Navigate from a list of *instances* of the same kind along a sequence of
+    *hops*, depth-first, and yield instances at the end of the path as soon
+    as they are reached. Instances are yielded in the same order as they
+    appear in the result of _navigate_hops(), and instances that already
+    have been visited at some hop are not visited again.
+    '''
+    visited = [set() for _ in hops]
+    return _walk_hops(instances, hops, visited, 0)
+
+
+def _walk_hops(instances, hops, visited, depth):
+    links = hops[depth]
+    seen = visited[depth]
+    last = depth == len(hops) - 1
+    for inst in instances:
+        if len(links) == 1:
+            other_insts = links[0].get(inst, ())
+        else:
+            link1, link2 = links
+            other_insts = [other_inst for assoc_inst in link1.get(inst, ())
+                           for other_inst in link2.get(assoc_inst, ())]
+            
+        for other_inst in other_insts:
+            if other_inst in seen:
+                continue
+            
+            seen.add(other_inst)
+            if last:
+                yield other_inst
+            else:
+                for result in _walk_hops((other_inst,), hops, visited, depth + 1):
+                    yield result
+
+
+def _navigate_path(handle, path, lazy=False):
+    '''
+    Navigate from a *handle*, i.e. a sequence of instances, along a *path*
+    and return the resulting sequence of instances. Consecutive instances of
+    the same kind are navigated together using a compiled path, either one
+    hop at a time or, if *lazy* is set, depth-first so that the first
+    instance is found without visiting the rest of the model.
+    '''
+    if not path:
+        return handle
+    
+    if lazy:
+        navigate_hops = _navigate_hops_lazily
+    else:
+        navigate_hops = _navigate_hops
+        
+    if isinstance(handle, list) and len(handle) == 1:
+        metaclass = get_metaclass(handle[0])
+        return navigate_hops(handle, metaclass.compile_path(path))
+    
+    return _navigate_groups(handle, path, navigate_hops)
+
+    
+def _navigate_groups(handle, path, navigate_hops):
+    groups = list()
+    metaclass = None
+    for inst in handle:
+        other_metaclass = get_metaclass(inst)
+        if other_metaclass is not metaclass:
+            metaclass = other_metaclass
+            groups.append((metaclass, list()))
+
+        groups[-1][1].append(inst)
+        
+    if len(groups) == 1:
+        metaclass, group = groups[0]
+        for result in navigate_hops(group, metaclass.compile_path(path)):
+            yield result
+        return
+    
+    # instances may be reached from several groups
+    visited = set()
+    for metaclass, group in groups:
+        for result in navigate_hops(group, metaclass.compile_path(path)):
+            if result not in visited:
+                visited.add(result)
+                yield result
+
+
 class NavChain(object):
     '''
     A navigation chain initializes a navigation from one or more instances.
@@ -745,22 +1778,16 @@ class NavChain(object):
             raise MetaException("Unable to navigate across '%s'" % type(handle))
         
         self.handle = handle
+        self.path = list()
         self._kind = None
         
     def nav(self, kind, relid, phrase=''):
-        self.handle = NavChain._nav(self.handle, kind, relid, phrase)
+        if isinstance(relid, int):
+            relid = 'R%d' % relid
+            
+        self.path.append((kind, relid, phrase))
         return self
     
-    @staticmethod
-    def _nav(handle, kind, rel_id, phrase):
-        if isinstance(rel_id, int):
-            rel_id = 'R%d' % rel_id
-    
-        for inst in iter(handle):
-            metaclass = get_metaclass(inst)
-            for result in metaclass.navigate(inst, kind, rel_id, phrase):
-                yield result
-            
     def __getattr__(self, kind):
         '''
         The navigation chain specified a *kind*, e.g.
@@ -789,11 +1816,29 @@ class NavChain(object):
         >>> chain(lambda selected: selected.Name == 'test')
         '''
         handle = self.handle or list()
-        handle = apply_query_operators(handle, args)
-        if isinstance(handle, QuerySet):
-            return handle
+        path = tuple(self.path)
+        if path:
+            iterable = _navigate_path(handle, path)
         else:
-            return QuerySet(handle)
+            iterable = _unique(handle)
+            
+        return QuerySet(Query(lambda ops: iterable, args)._evaluate())
+    
+    def lazy(self, *args):
+        '''
+        Like invoking the navigation chain, but return a lazily evaluated
+        query which may be refined further, and is not evaluated until its
+        content is accessed. Unknown links are reported immediately.
+        '''
+        handle = list(self.handle or list())
+        path = tuple(self.path)
+        if not path:
+            return Query(lambda ops: _unique(handle), args)
+        
+        for metaclass in set(get_metaclass(inst) for inst in handle):
+            metaclass.compile_path(path)
+            
+        return Query(lambda ops: _navigate_path(handle, path), args)
     
     
 class NavOneChain(NavChain):
@@ -801,9 +1846,12 @@ class NavOneChain(NavChain):
     A navigation chain that yeilds an instance, or None.
     '''
     def __call__(self, *args):
-        handle = self.handle or list()
-        handle = apply_query_operators(handle, args)
-        return next(iter(handle), None)
+        handle = _navigate_path(self.handle or list(), tuple(self.path),
+                                lazy=True)
+        if not args:
+            return next(iter(handle), None)
+        
+        return Query(lambda ops: handle, args).first
 
 
 def navigate_one(instance):
@@ -966,20 +2014,15 @@ def _find_link(inst1, inst2, rel_id, phrase):
 
     if isinstance(rel_id, int):
         rel_id = 'R%d' % rel_id
-        
-    for ass in metaclass1.metamodel.associations:
-        if ass.rel_id != rel_id:
-            continue
-
-        if (ass.source_link.from_metaclass.kind == metaclass1.kind and
-            ass.source_link.to_metaclass.kind == metaclass2.kind and
-            ass.source_link.phrase == phrase):
-            return inst1, inst2, ass
 
-        if (ass.target_link.from_metaclass.kind == metaclass1.kind and
-            ass.target_link.to_metaclass.kind == metaclass2.kind and
-            ass.target_link.phrase == phrase):
+    key = (rel_id, metaclass1.kind.upper(), metaclass2.kind.upper(), phrase)
+    value = metaclass1.metamodel.links.get(key)
+    if value is not None:
+        ass, swapped = value
+        if swapped:
             return inst2, inst1, ass
+        else:
+            return inst1, inst2, ass
 
     raise UnknownLinkException(metaclass1.kind, metaclass2.kind, rel_id, phrase)
 
@@ -1003,6 +2046,8 @@ def relate(from_instance, to_instance, rel_id, phrase=''):
 
     if not ass.target_link.connect(inst2, inst1):
         raise RelateException(from_instance, to_instance, rel_id, phrase)
+
+    _update_indices(inst2, ass.source_keys)
     
     return True
 
@@ -1026,6 +2071,8 @@ def unrelate(from_instance, to_instance, rel_id, phrase=''):
 
     if not ass.target_link.disconnect(inst2, inst1):
         raise UnrelateException(from_instance, to_instance, rel_id, phrase)
+
+    _update_indices(inst2, ass.source_keys)
         
     return True
 
@@ -1080,14 +2127,32 @@ class OrderBy(list):
     instance set.
     '''
     reverse = False
-
+    key = None
+    
     def __init__(self, attrs, reverse=False):
         list.__init__(self, attrs)
         self.reverse = reverse
-
-    def __call__(self, s):
-        key = lambda el: [getattr(el, name) for name in self]
-        return sorted(s, key=key, reverse=self.reverse)
+        if attrs:
+            self.key = operator.attrgetter(*attrs)
+        else:
+            self.key = lambda el: ()
+        
+    def __call__(self, s, limit=None):
+        '''
+        Sort a sequence of instances *s*. Optionally, a *limit* on the number
+        of instances to return may be provided, in which case only the top
+        instances are computed using a heap rather than sorting all of them.
+        The ordering is stable, i.e. instances with equal keys retain their
+        relative order.
+        '''
+        if limit is None:
+            return sorted(s, key=self.key, reverse=self.reverse)
+        
+        elif self.reverse:
+            return heapq.nlargest(limit, s, key=self.key)
+        
+        else:
+            return heapq.nsmallest(limit, s, key=self.key)
 
 
 def order_by(*attrs):
@@ -1130,6 +2195,8 @@ class MetaModel(object):
     '''
     metaclasses = None
     associations = None
+    links = None
+    paths = None
     id_generator = None
     
     def __init__(self, id_generator=None):
@@ -1142,6 +2209,8 @@ class MetaModel(object):
         
         self.metaclasses = dict()
         self.associations = list()
+        self.links = dict()
+        self.paths = dict()
         self.id_generator = id_generator
     
     @property
@@ -1196,6 +2265,24 @@ class MetaModel(object):
         metaclass = self.find_metaclass(kind)
         return metaclass.new(*args, **kwargs)
         
+    def bulk_new(self, kind, rows=None, columns=None):
+        '''
+        Create and return a list of new instances in the metamodel of some
+        *kind*, either from *rows* of positional attribute values, or from
+        *columns* of values, i.e. a dictionary that maps attribute names to
+        equally long sequences of values. Referential attributes are resolved
+        using a single hash join per association once all instances have been
+        created.
+        
+        Usage example:
+        
+        >>> m = xtuml.load_metamodel('db.sql')
+        >>> insts = m.bulk_new('My_Class', columns={'Name': ['a', 'b', 'c'],
+        ...                                         'Number': [1, 2, 3]})
+        '''
+        metaclass = self.find_metaclass(kind)
+        return metaclass.bulk_new(rows, columns)
+        
     def clone(self, instance):
         '''
         Create a shallow clone of an *instance*.
@@ -1239,9 +2326,137 @@ class MetaModel(object):
         target_link.key_map = dict(zip(target_keys, source_keys))
         
         self.associations.append(ass)
+        self.paths.clear()
+        
+        for link, swapped in [(source_link, False), (target_link, True)]:
+            key = (rel_id, link.from_metaclass.kind.upper(),
+                   link.to_metaclass.kind.upper(), link.phrase)
+            self.links.setdefault(key, (ass, swapped))
 
         return ass
         
+    def batch_relate(self, timings=None):
+        '''
+        Re-derive all links in the metamodel from the values of referential
+        and identifying attributes. Existing links are discarded, and
+        instances are matched using hash joins rather than by querying each
+        instance individually.
+        
+        Raw referential values, i.e. values which are kept by metaclasses
+        but not yet reflected by any link, takes precedence over values
+        derived from existing links, and are removed once the links have
+        been re-derived. Referential attributes of formalized associations
+        cannot be assigned directly, so use MetaClass.set_raw_value() to
+        modify them in bulk before re-deriving the links.
+        
+        Optionally, the number of seconds spent in each phase (index, clear
+        and connect) is recorded in a dictionary of *timings*.
+        '''
+        if timings is None:
+            timings = dict()
+            
+        start = time.time()
+        for ass in self.associations:
+            for link in (ass.source_link, ass.target_link):
+                link.__class__ = Link
+                link.__dict__.pop('relate', None)
+        
+        # Target keys are sorted so that associations which refer to the same
+        # attributes of a class share a single index. Indices and lookup keys
+        # are computed per class to visit each instance only once.
+        indices = dict()
+        indexers = collections.defaultdict(list)
+        lookups = collections.defaultdict(list)
+        joins = list()
+        for ass in self.associations:
+            source_class = ass.source_link.to_metaclass
+            target_class = ass.target_link.to_metaclass
+            key_map = sorted(ass.source_link.key_map.items(),
+                             key=operator.itemgetter(1))
+            source_keys = [source_key for source_key, _ in key_map]
+            target_keys = [target_key for _, target_key in key_map]
+            
+            index_key = (target_class.kind.upper(), tuple(target_keys))
+            if index_key not in indices:
+                indices[index_key] = dict()
+                extractor = _key_extractor(target_class, target_keys)
+                indexers[target_class].append((indices[index_key], extractor))
+                
+            lookup_keys = list()
+            extractor = _key_extractor(source_class, source_keys)
+            lookups[source_class].append((lookup_keys, extractor))
+            joins.append((ass, indices[index_key], lookup_keys))
+
+        for metaclass in self.metaclasses.values():
+            class_indexers = indexers.get(metaclass, ())
+            class_lookups = lookups.get(metaclass, ())
+            if not (class_indexers or class_lookups or metaclass.raw_values):
+                continue
+
+            for inst in metaclass.storage:
+                for index, extract in class_indexers:
+                    key = extract(inst)
+                    if key is None:
+                        continue
+                    
+                    if key in index:
+                        index[key].append(inst)
+                    else:
+                        index[key] = [inst]
+                        
+                for lookup_keys, extract in class_lookups:
+                    key = extract(inst)
+                    if key is not None:
+                        lookup_keys.append((inst, key))
+
+            # Only extractors of the class itself read its raw values, so they
+            # may be dropped while keys of other classes remain unknown.
+            for raw_values in metaclass.raw_values.values():
+                raw_values.clear()
+
+        timings['index'] = time.time() - start
+        start = time.time()
+        
+        for ass in self.associations:
+            ass.source_link.clear()
+            ass.target_link.clear()
+
+        timings['clear'] = time.time() - start
+        start = time.time()
+        
+        for ass, index, lookup_keys in joins:
+            source_connect = ass.source_link.connect
+            target_connect = ass.target_link.connect
+            for inst1, key in lookup_keys:
+                for inst2 in index.get(key, ()):
+                    source_connect(inst2, inst1, check=False)
+                    target_connect(inst1, inst2, check=False)
+
+        self.invalidate_indices()
+        timings['connect'] = time.time() - start
+        
+    def lazy_relate(self):
+        '''
+        Like batch_relate(), but defer relating instances across each
+        association until the first time any of its links is used, e.g. when
+        an instance is navigated, related or checked across the association.
+        
+        Raw referential values are kept by metaclasses until all associations
+        which depend on them have been related. The time spent relating
+        instances, and the memory used by links, hence scale with the number
+        of associations that are actually used.
+        '''
+        pending = collections.defaultdict(int)
+        for ass in self.associations:
+            source_class = ass.source_link.to_metaclass
+            for name in ass.source_link.key_map:
+                pending[(source_class, name)] += 1
+                
+            relate = partial(_relate_pending, ass, pending)
+            for link in (ass.source_link, ass.target_link):
+                link.__class__ = _PendingLink
+                link.relate = relate
+                
     def define_unique_identifier(self, kind, name, *named_attributes):
         '''
         Define a unique identifier for some *kind* of class based on its
@@ -1256,6 +2471,35 @@ class MetaModel(object):
         metaclass = self.find_metaclass(kind)
         metaclass.indices[name] = tuple(named_attributes)
         metaclass.identifying_attributes |= set(named_attributes)
+        metaclass.add_index(named_attributes)
+
+    def define_index(self, kind, *named_attributes):
+        '''
+        Define a secondary, non-unique, index for some *kind* of class on its
+        *named attributes*. Queries that filter instances by those attributes
+        using where_eq() are answered using the index rather than by scanning
+        all instances of the class.
+        
+        Usage example:
+        
+        >>> m = xtuml.load_metamodel('db.sql')
+        >>> m.define_index('My_Class', 'Name')
+        >>> inst = m.select_any('My_Class', where_eq(Name='Test'))
+        '''
+        if not named_attributes:
+            return
+        
+        metaclass = self.find_metaclass(kind)
+        return metaclass.add_index(named_attributes)
+
+    def invalidate_indices(self):
+        '''
+        Invalidate the hash indices of all metaclasses in the metamodel, e.g.
+        after instances have been modified without using relate(), unrelate()
+        or attribute assignments.
+        '''
+        for metaclass in self.metaclasses.values():
+            metaclass.invalidate_indices()
 
     def select_many(self, kind, *args):
         '''
@@ -1271,6 +2515,19 @@ class MetaModel(object):
         metaclass = self.find_metaclass(kind)
         return metaclass.select_many(*args)
     
+    def select_lazily(self, kind, *args):
+        '''
+        Like select_many(), but return a lazily evaluated query, see
+        xtuml.Query.
+        
+        Usage example:
+        
+        >>> m = xtuml.load_metamodel('db.sql')
+        >>> q = m.select_lazily('My_Class').where(Name='Test').limit(5)
+        '''
+        metaclass = self.find_metaclass(kind)
+        return metaclass.select_lazily(*args)
+    
     def select_one(self, kind, *args):
         '''
         Query the metamodel for a single instance of some *kind*. Query
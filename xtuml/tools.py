@@ -16,9 +16,138 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with pyxtuml. If not, see <http://www.gnu.org/licenses/>.
 import collections
+import importlib
+import io
+import sys
 import uuid
 
 
+# Supported compression formats, i.e. tuples of a file suffix, the magic bytes
+# at the start of compressed files, and the name of the module that handle it.
+_compressions = [
+    ('.gz', b'\x1f\x8b', 'gzip'),
+    ('.bz2', b'BZh', 'bz2'),
+    ('.xz', b'\xfd7zXZ\x00', 'lzma'),
+]
+
+
+def find_compression(path, mode='r'):
+    '''
+    Find the name of the module that handle compression of a file with some
+    *path*, or None if the file is not compressed. When the file is opened for
+    reading, i.e. the *mode* is 'r', the compression is detected by magic
+    bytes at the start of the file, otherwise by the suffix of the path. The
+    *path* may also be a binary file object open for reading, which is
+    rewound after its magic bytes have been read.
+    '''
+    if 'r' not in mode:
+        for suffix, _, name in _compressions:
+            if path.endswith(suffix):
+                return name
+        return None
+    
+    if hasattr(path, 'read'):
+        magic = path.read(6)
+        path.seek(0)
+    else:
+        with open(path, 'rb') as f:
+            magic = f.read(6)
+            
+    for _, prefix, name in _compressions:
+        if magic.startswith(prefix):
+            return name
+
+
+def _import_compression(name, path):
+    '''
+    Import the module with some *name* that handle compression of a file with
+    some *path*. An IOError is raised if the module is not available, e.g. lzma
+    on python 2.
+    '''
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        raise IOError('unable to handle %s, compression using %s is not '
+                      'supported by this python interpreter' % (path, name))
+
+
+def _close_with(stream, f):
+    '''
+    Make a *stream* close an underlying file *f* when the stream is closed.
+    '''
+    close = stream.close
+    
+    def close_both():
+        try:
+            close()
+        finally:
+            f.close()
+            
+    stream.close = close_both
+    return stream
+
+
+def open_compressed(path, mode='r'):
+    '''
+    Like open_file(), but return a tuple of the name of the module that handle
+    compression of the file, or None if the file is not compressed, and the
+    opened file. Files opened for reading are only opened once, i.e. the magic
+    bytes are read from the same file that is returned.
+    '''
+    if 'r' not in mode:
+        name = find_compression(path, mode)
+        if name is None:
+            return None, open(path, mode)
+        
+        module = _import_compression(name, path)
+        if sys.version_info[0] < 3:
+            opener = getattr(module, 'open', None) or module.BZ2File
+            return name, opener(path, mode.replace('t', ''))
+        
+        if 'b' not in mode and 't' not in mode:
+            mode += 't'
+        
+        return name, module.open(path, mode)
+    
+    f = open(path, 'rb')
+    try:
+        name = find_compression(f)
+        if name is None:
+            if 'b' in mode or sys.version_info[0] < 3:
+                return None, f
+            
+            return None, io.TextIOWrapper(f)
+        
+        module = _import_compression(name, path)
+        if sys.version_info[0] < 3:
+            if name == 'gzip':
+                return name, _close_with(module.GzipFile(fileobj=f), f)
+            
+            # BZ2File on python 2 only accepts filenames
+            f.close()
+            return name, module.BZ2File(path, 'r')
+        
+        if 'b' not in mode and 't' not in mode:
+            mode += 't'
+            
+        return name, _close_with(module.open(f, mode), f)
+    except:
+        f.close()
+        raise
+
+
+def open_file(path, mode='r'):
+    '''
+    Open a file with some *path* in some *mode*, like the builtin python
+    function *open()*. Files compressed using gzip, bzip2 or xz are
+    decompressed or compressed transparently while being read or written, see
+    find_compression(). An IOError is raised for compression formats that
+    the python interpreter does not support, e.g. xz on python 2.
+    '''
+    _, f = open_compressed(path, mode)
+    return f
+
+
 class IdGenerator(object):
     '''
     Base class for generating unique identifiers.
@@ -131,9 +260,12 @@ class OrderedSet(collections.MutableSet):
     def __init__(self, iterable=None):
         self.end = end = [] 
         end += [None, end, end]         # sentinel node for doubly linked list
-        self.map = {}                   # key --> [key, prev, next]
+        self.map = map_ = {}            # key --> [key, prev, next]
         if iterable is not None:
-            self |= iterable
+            for key in iterable:
+                if key not in map_:
+                    curr = end[1]
+                    curr[2] = end[1] = map_[key] = [key, curr, end]
 
     def add(self, key):
         if key not in self.map: